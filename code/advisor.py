@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from dealer_odds import dealer_distribution, remove_card, unseen_composition
+from strategy import stand_ev
+
+# Finished hints kept for instant answers when a state comes back
+HINT_CACHE_SIZE = 4096
+
+_hints = OrderedDict()
+_hints_lock = threading.Lock()
+# Cancellation check of the hint being computed on the current thread
+_local = threading.local()
+
+
+class HintCancelled(Exception):
+    """Raised inside a hint calculation when the game state has moved on"""
+
+
+@lru_cache(maxsize=200_000)
+def state_evs(composition, hard_total, has_ace, upcard, hit_soft_17=False, push_on_22=False):
+    """
+    Expected return of standing and of hitting (then playing on perfectly)
+    for a player hand with the given hard total and Ace flag, against the
+    dealer upcard, with every later card drawn from composition. The dealer
+    draws from whatever the player leaves, like the real shoe, under the
+    hit_soft_17 and push_on_22 rules. Returns (stand_ev, hit_ev).
+    """
+    should_stop = getattr(_local, "should_stop", None)
+    if should_stop is not None and should_stop():
+        # Nothing is cached for a cancelled call, so it is safe to stop here
+        raise HintCancelled()
+
+    total = hard_total + 10 if has_ace and hard_total <= 11 else hard_total
+    stand = stand_ev(total, dealer_distribution(upcard, composition, hit_soft_17), push_on_22)
+
+    remaining = sum(composition)
+    if remaining == 0:
+        return stand, -1.0
+
+    hit = 0.0
+    for index, count in enumerate(composition):
+        if not count:
+            continue
+        probability = count / remaining
+        new_hard = hard_total + index + 1
+        if new_hard > 21:
+            hit -= probability
+        else:
+            next_stand, next_hit = state_evs(remove_card(composition, index), new_hard,
+                                             has_ace or index == 0, upcard, hit_soft_17,
+                                             push_on_22)
+            hit += probability * max(next_stand, next_hit)
+    return stand, hit
+
+
+def hint_key(game):
+    """
+    Everything a hint depends on, read from a Game21 on the UI thread:
+    (unseen card composition, player hard total, Ace flag, dealer upcard,
+    and the two dealer rules that change the odds).
+    """
+    hand = game.player_hand
+    return (unseen_composition(game), hand.hard_total, hand.aces > 0,
+            game.card_value(game.dealer_hand[1]), game.rules.hit_soft_17, game.rules.push_on_22)
+
+
+def cached_hint(key):
+    """Return the finished hint for key, or None if it has not been computed."""
+    with _hints_lock:
+        hint = _hints.get(key)
+        if hint is not None:
+            _hints.move_to_end(key)
+        return hint
+
+
+def compute_hint(key, should_stop=None):
+    """
+    Work out (stand_ev, hit_ev) for a hint key. should_stop is polled during
+    the calculation; when it returns True, HintCancelled is raised.
+    """
+    hint = cached_hint(key)
+    if hint is not None:
+        return hint
+
+    _local.should_stop = should_stop
+    try:
+        hint = state_evs(*key)
+    finally:
+        _local.should_stop = None
+
+    with _hints_lock:
+        _hints[key] = hint
+        if len(_hints) > HINT_CACHE_SIZE:
+            _hints.popitem(last=False)
+    return hint
@@ -0,0 +1,240 @@
+import argparse
+import time
+
+import numpy as np
+
+from cards import CARD_VALUES, CARD_IS_ACE, ORDERED_DECK
+from game_logic import PLAYER_BUST, DEALER_BUST, PLAYER_WIN, DEALER_WIN, PUSH
+from rules import RuleConfig, add_rule_arguments, rules_from_args
+from simulation import POLICIES, TABLE_POLICIES, get_policy, summarise
+
+# Card lookup tables as arrays, so a whole column of cards converts at once
+VALUES = np.frombuffer(CARD_VALUES, dtype=np.uint8).astype(np.int16)
+IS_ACE = np.frombuffer(CARD_IS_ACE, dtype=np.uint8).astype(np.int16)
+
+
+class Game21Batch:
+    """
+    Many independent Game21 tables stepped together with NumPy.
+
+    Every table has its own shoe (one row of the shoe matrix), deck pointer
+    and hands, stored as a hard total (Aces as 1) plus an Ace count like
+    game_logic.Hand. Dealing, hit/stand decisions and the dealer's
+    hit-to-17 rule are applied to all tables in one vectorised step; Python
+    only loops over card draws, never over tables. Shoes are shuffled lazily
+    and reshuffled at the cut card exactly like game_logic.Shoe.
+
+    Policies are vectorised versions of the simulation policies: they get
+    arrays of player totals, soft flags and dealer upcards and return a
+    boolean hit array (the comparison-based policies in simulation.py work
+    unchanged).
+
+    rules (a rules.RuleConfig, which then also sets the deck count) are
+    compiled once: the dealer's hit limit is looked up per soft flag, and the
+    natural and push-on-22 conditions are only added to the outcome selection
+    when those rules are on.
+    """
+
+    def __init__(self, tables, num_decks=1, penetration=0.75, seed=None, rules=None):
+        self.tables = tables
+        self.rules = RuleConfig(num_decks=num_decks) if rules is None else rules
+        self.compiled_rules = self.rules.compile()
+        self.dealer_limits = np.array(self.compiled_rules.dealer_limits, dtype=np.int16)
+        self.rng = np.random.default_rng(seed)
+        self.shoes = np.tile(np.frombuffer(ORDERED_DECK * self.rules.num_decks, dtype=np.uint8),
+                             (tables, 1))
+        self.size = self.shoes.shape[1]
+        self.cut_card = min(int(self.size * penetration), self.size - 4)
+        self.positions = np.zeros(tables, dtype=np.int64)
+        self.reshuffles = 0
+        self.rows = np.arange(tables)
+
+        self.player_hard = np.zeros(tables, dtype=np.int16)
+        self.player_aces = np.zeros(tables, dtype=np.int16)
+        self.dealer_hard = np.zeros(tables, dtype=np.int16)
+        self.dealer_aces = np.zeros(tables, dtype=np.int16)
+        self.upcards = np.zeros(tables, dtype=np.int16)
+        # Tables whose player has neither stood nor busted yet
+        self.active = np.zeros(tables, dtype=bool)
+        self.player_natural = np.zeros(tables, dtype=bool)
+        self.dealer_natural = np.zeros(tables, dtype=bool)
+        # Rounds ended by a natural straight after the deal
+        self.settled = np.zeros(tables, dtype=bool)
+
+    # DEALING
+
+    def draw(self, rows):
+        """Draw one card for each table in rows (an index array)."""
+        positions = self.positions[rows]
+        # A very long round can run past the end of a small shoe
+        dry = positions == self.size
+        if dry.any():
+            positions[dry] = 0
+            self.reshuffles += int(dry.sum())
+
+        # One lazy Fisher-Yates step per table
+        swap = self.rng.integers(positions, self.size)
+        shoes = self.shoes
+        cards = shoes[rows, swap]
+        shoes[rows, swap] = shoes[rows, positions]
+        shoes[rows, positions] = cards
+        self.positions[rows] = positions + 1
+        return cards
+
+    def new_round(self):
+        # Tables past the cut card reshuffle (rewind) their shoe
+        past_cut = self.positions >= self.cut_card
+        self.positions[past_cut] = 0
+        self.reshuffles += int(past_cut.sum())
+
+    def deal_initial_cards(self):
+        rows = self.rows
+        first, second = self.draw(rows), self.draw(rows)
+        hidden, upcard = self.draw(rows), self.draw(rows)
+
+        self.player_hard[:] = VALUES[first] + VALUES[second] - 10 * (IS_ACE[first] + IS_ACE[second])
+        self.player_aces[:] = IS_ACE[first] + IS_ACE[second]
+        self.dealer_hard[:] = VALUES[hidden] + VALUES[upcard] - 10 * (IS_ACE[hidden] + IS_ACE[upcard])
+        self.dealer_aces[:] = IS_ACE[hidden] + IS_ACE[upcard]
+        # dealer_hand[0] is the hidden card, so the upcard is the second one
+        self.upcards[:] = VALUES[upcard]
+        self.active[:] = True
+
+        rules = self.compiled_rules
+        if rules.naturals:
+            self.player_natural[:] = self.player_totals() == 21
+            self.dealer_natural[:] = self.dealer_totals() == 21
+            self.settled[:] = self.player_natural
+            if rules.dealer_peek:
+                self.settled |= self.dealer_natural
+            self.active &= ~self.settled
+
+    # HAND VALUES
+
+    @staticmethod
+    def totals(hard, aces):
+        # Same rule as Hand.total: one Ace counts as 11 if it does not bust
+        return np.where((aces > 0) & (hard <= 11), hard + 10, hard)
+
+    def player_totals(self):
+        return self.totals(self.player_hard, self.player_aces)
+
+    def player_soft(self):
+        return (self.player_aces > 0) & (self.player_hard <= 11)
+
+    def dealer_totals(self):
+        return self.totals(self.dealer_hard, self.dealer_aces)
+
+    def dealer_soft(self):
+        return (self.dealer_aces > 0) & (self.dealer_hard <= 11)
+
+    # PLAYER AND DEALER TURNS
+
+    def step(self, hit):
+        """
+        Apply a hit/stand decision vector. Active tables with hit=True get a
+        card, the others stand. Returns the tables that are still active.
+        """
+        rows = np.flatnonzero(self.active & hit)
+        self.active[:] = False
+        if rows.size:
+            cards = self.draw(rows)
+            self.player_hard[rows] += VALUES[cards] - 10 * IS_ACE[cards]
+            self.player_aces[rows] += IS_ACE[cards]
+            # Busted players stop; the others may hit again
+            self.active[rows] = self.player_hard[rows] <= 21
+        return self.active
+
+    def play_player_turn(self, policy):
+        while self.active.any():
+            hit = policy(self.player_totals(), self.player_soft(), self.upcards)
+            self.step(np.asarray(hit, dtype=bool))
+
+    def play_dealer_turn(self):
+        # The dealer only plays against players who did not bust (or were
+        # settled at the deal), hitting like Game21.play_dealer_turn
+        playing = (self.player_hard <= 21) & ~self.settled
+        limits = self.dealer_limits
+        while True:
+            limit = limits[self.dealer_soft().astype(np.intp)]
+            rows = np.flatnonzero(playing & (self.dealer_totals() < limit))
+            if not rows.size:
+                break
+            cards = self.draw(rows)
+            self.dealer_hard[rows] += VALUES[cards] - 10 * IS_ACE[cards]
+            self.dealer_aces[rows] += IS_ACE[cards]
+
+    # WINNER DETERMINATION
+
+    def outcomes(self):
+        """Outcome codes for every table, with the same precedence as Game21.round_outcome."""
+        player = self.player_totals()
+        dealer = self.dealer_totals()
+        rules = self.compiled_rules
+        conditions = [self.player_hard > 21]
+        choices = [PLAYER_BUST]
+        if rules.naturals:
+            conditions += [self.player_natural & self.dealer_natural, self.player_natural,
+                           self.dealer_natural]
+            choices += [PUSH, PLAYER_WIN, DEALER_WIN]
+        if rules.push_total:
+            conditions.append(self.dealer_hard == rules.push_total)
+            choices.append(PUSH)
+        conditions += [self.dealer_hard > 21, player > dealer, dealer > player]
+        choices += [DEALER_BUST, PLAYER_WIN, DEALER_WIN]
+        return np.select(conditions, choices, default=PUSH)
+
+    def play_round(self, policy):
+        self.new_round()
+        self.deal_initial_cards()
+        self.play_player_turn(policy)
+        self.play_dealer_turn()
+        return self.outcomes()
+
+    def run(self, rounds, policy):
+        """
+        Play rounds on every table and return the same result dictionary as
+        simulation.simulate (tables * rounds hands in total).
+        """
+        counts = np.zeros(5, dtype=np.int64)
+        natural_wins = 0
+        reshuffles_before = self.reshuffles
+        start = time.perf_counter()
+        for _ in range(rounds):
+            counts += np.bincount(self.play_round(policy), minlength=5)
+            if self.compiled_rules.naturals:
+                natural_wins += int((self.player_natural & ~self.dealer_natural).sum())
+        elapsed = time.perf_counter() - start
+        return summarise([int(count) for count in counts], elapsed,
+                         self.reshuffles - reshuffles_before, natural_wins,
+                         self.compiled_rules.natural_payout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorised Game of 21 simulation")
+    parser.add_argument("--tables", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--policy", choices=sorted(POLICIES) + TABLE_POLICIES, default="dealer")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--decks", type=int, default=1, help="number of decks in the shoe")
+    parser.add_argument("--penetration", type=float, default=0.75,
+                        help="fraction of the shoe dealt before the cut card")
+    add_rule_arguments(parser)
+    args = parser.parse_args()
+
+    rules = rules_from_args(args)
+    batch = Game21Batch(args.tables, args.decks, args.penetration, args.seed, rules)
+    policy = get_policy(args.policy, rules)
+    if hasattr(policy, "numpy_policy"):
+        policy = policy.numpy_policy()
+    result = batch.run(args.rounds, policy)
+
+    print(f"Hands: {result['total_games']}")
+    for name, count in result['outcomes'].items():
+        print(f"  {name:12} {count:>12}  {count / result['total_games']:.4%}")
+    print(f"Rules: {rules.key()} | EV: {result['ev']:+.4f} bets/hand")
+    print(f"{result['rounds_per_sec']:,.0f} hands/sec")
+
+
+if __name__ == '__main__':
+    main()
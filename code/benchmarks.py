@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from cards import DECK_SIZE, ORDERED_DECK
+from game_logic import Game21, Shoe
+
+# Average number of cards a round uses
+CARDS_PER_ROUND = 6
+
+# A benchmark regresses when its ops/sec drops by more than this fraction
+DEFAULT_THRESHOLD = 0.10
+
+
+# MEASUREMENT
+
+def measure(op, setup=None, batch=100, samples=200):
+    """
+    Time op() in samples of batch calls, running setup() (untimed) before
+    each sample. Returns ops/sec and per-call latency percentiles in
+    microseconds.
+    """
+    timer = time.perf_counter_ns
+    latencies = []
+    for _ in range(samples):
+        if setup is not None:
+            setup()
+        start = timer()
+        for _ in range(batch):
+            op()
+        latencies.append((timer() - start) / batch / 1000)
+
+    cuts = statistics.quantiles(latencies, n=100)
+    mean = statistics.fmean(latencies)
+    return {
+        'ops_per_sec': 1e6 / mean if mean > 0 else 0.0,
+        'mean_us': mean,
+        'p50_us': cuts[49],
+        'p90_us': cuts[89],
+        'p99_us': cuts[98],
+    }
+
+
+# GAME LOGIC HOT PATHS
+
+def game_benchmarks(seed=0):
+    """Benchmark the Game21 methods on the hot path of every round."""
+    game = Game21(seed=seed)
+    hand = [0, 17, 44]
+
+    def fresh_round():
+        game.new_round()
+        game.deal_initial_cards()
+
+    return {
+        'create_deck': measure(game.create_deck),
+        'new_round': measure(game.new_round),
+        'draw_card': measure(game.draw_card, setup=game.shoe.reshuffle, batch=40),
+        'card_value': measure(lambda: game.card_value(37), batch=1000),
+        'hand_total': measure(lambda: game.hand_total(hand), batch=1000),
+        'play_dealer_turn': measure(game.play_dealer_turn, setup=fresh_round, batch=1, samples=2000),
+        'decide_winner': measure(game.decide_winner, setup=fresh_round),
+    }
+
+
+# UI ROUND TRIPS
+
+def ui_benchmarks(seed=0, samples=200):
+    """
+    Time MainWindow.new_round_setup, on_hit and on_stand (up to the
+    result, with no delay between dealer draws), and full new round + hit +
+    stand cycles including the repaint, under Qt's offscreen platform.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    import main
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    window = main.MainWindow(welcome=False)
+    window.game = Game21(seed=seed)
+    # The result dialog waits for the user, so it is left out of the timings
+    window.show_result_dialog = lambda result_message: None
+    # Dealer draws are normally spaced out for the player to watch
+    window.dealer_timer.setInterval(0)
+    window.show()
+    app.processEvents()
+
+    def new_round():
+        window.game.new_round()
+        window.new_round_setup()
+
+    def stand():
+        # Stand and let the timer-driven dealer turn run to the result
+        window.on_stand()
+        while window.round_state.state == main.DEALER_TURN:
+            app.processEvents()
+
+    def cycle():
+        new_round()
+        window.on_hit()
+        stand()
+        app.processEvents()
+
+    themes = ['light', 'dark', 'high_contrast']
+    font_sizes = [10, 14]
+    switches = [0]
+
+    def switch_theme():
+        # Every call changes both theme and font size, then paints the window
+        switches[0] += 1
+        window.current_theme = themes[switches[0] % len(themes)]
+        window.current_font_size = font_sizes[switches[0] % 2]
+        window.apply_theme()
+        app.processEvents()
+
+    results = {
+        'ui_new_round_setup': measure(window.new_round_setup, setup=window.game.new_round,
+                                      batch=1, samples=samples),
+        'ui_on_hit': measure(window.on_hit, setup=new_round, batch=1, samples=samples),
+        'ui_on_stand': measure(stand, setup=new_round, batch=1, samples=samples),
+        'ui_cycle': measure(cycle, batch=1, samples=samples),
+        'ui_theme_switch': measure(switch_theme, batch=1, samples=samples // 4),
+    }
+    window.close()
+    return results
+
+
+# SHUFFLING
+
+def full_shuffle_round(rng):
+    """The old way: build and shuffle a whole deck, then deal a few cards."""
+    deck = ORDERED_DECK[:]
+    rng.shuffle(deck)
+    return deck[:CARDS_PER_ROUND]
+
+
+def lazy_shuffle_round(shoe):
+    """The Shoe way: reshuffle (rewind) and draw only the cards needed."""
+    shoe.reshuffle()
+    return [shoe.draw() for _ in range(CARDS_PER_ROUND)]
+
+
+def bench_shuffle(rounds=200_000, seed=0):
+    """
+    Compare the per-round cost of a full shuffle with the lazy shoe, with a
+    fresh deck every round in both cases. Also returns a chi-square statistic
+    of the first dealt card for each method (51 degrees of freedom, so values
+    around 51 mean the cards are dealt uniformly).
+    """
+    results = {}
+
+    rng = random.Random(seed)
+    first_cards = [0] * DECK_SIZE
+    start = time.perf_counter()
+    for _ in range(rounds):
+        first_cards[full_shuffle_round(rng)[0]] += 1
+    results['full'] = (time.perf_counter() - start, chi_square(first_cards))
+
+    shoe = Shoe(1, rng=random.Random(seed))
+    first_cards = [0] * DECK_SIZE
+    start = time.perf_counter()
+    for _ in range(rounds):
+        first_cards[lazy_shuffle_round(shoe)[0]] += 1
+    results['lazy'] = (time.perf_counter() - start, chi_square(first_cards))
+
+    return results
+
+
+def chi_square(observed):
+    expected = sum(observed) / len(observed)
+    return sum((count - expected) ** 2 / expected for count in observed)
+
+
+# BASELINE COMPARISON
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare ops/sec against a baseline. Returns a list of
+    (name, baseline_ops, current_ops, change) for benchmarks that got slower
+    by more than threshold.
+    """
+    regressions = []
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]['ops_per_sec']
+        change = current['ops_per_sec'] / before - 1 if before else 0.0
+        if change < -threshold:
+            regressions.append((name, before, current['ops_per_sec'], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game of 21 benchmarks")
+    parser.add_argument("--output", default="bench_results.json",
+                        help="where to write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="also write the results here as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed ops/sec drop before failing (0.10 = 10%%)")
+    parser.add_argument("--no-ui", action="store_true", help="skip the Qt benchmarks")
+    parser.add_argument("--shuffle-rounds", type=int, default=200_000)
+    args = parser.parse_args()
+
+    results = game_benchmarks()
+    if not args.no_ui:
+        results.update(ui_benchmarks())
+
+    print(f"{'benchmark':20} {'ops/sec':>12} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9}")
+    for name, result in results.items():
+        print(f"{name:20} {result['ops_per_sec']:12,.0f} {result['p50_us']:9.2f} "
+              f"{result['p90_us']:9.2f} {result['p99_us']:9.2f}")
+
+    shuffles = bench_shuffle(args.shuffle_rounds)
+    for name, (elapsed, chi2) in shuffles.items():
+        print(f"{name:5} shuffle: {elapsed / args.shuffle_rounds * 1e6:7.2f} us/round  "
+              f"first-card chi2 = {chi2:.1f}")
+    saving = 1 - shuffles['lazy'][0] / shuffles['full'][0]
+    print(f"Lazy shuffle saves {saving:.0%} per round")
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, change in regressions:
+            print(f"REGRESSION {name}: {before:,.0f} -> {after:,.0f} ops/sec ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
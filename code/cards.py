@@ -0,0 +1,32 @@
+from array import array
+
+# Cards are small integers 0-51: card = rank * 4 + suit.
+# The order matches the old text deck (A♠, A♥, A♦, A♣, 2♠, ... K♣). The
+# shoe now shuffles lazily as it deals, so a seed no longer deals the same
+# cards as it did with the old full shuffle.
+
+RANKS = ["A"] + [str(n) for n in range(2, 11)] + ["J", "Q", "K"]
+SUITS = ["♠", "♥", "♦", "♣"]
+
+DECK_SIZE = 52
+
+# Rank lookup tables, indexed by rank 0-12
+RANK_VALUES = [11] + list(range(2, 11)) + [10, 10, 10]  # Ace starts as 11
+RANK_IS_ACE = [True] + [False] * 12
+
+# The same tables indexed directly by card, so hot paths need one lookup
+CARD_RANKS = bytes(card // 4 for card in range(DECK_SIZE))
+CARD_VALUES = bytes(RANK_VALUES[card // 4] for card in range(DECK_SIZE))
+CARD_IS_ACE = bytes(RANK_IS_ACE[card // 4] for card in range(DECK_SIZE))
+
+# Display strings are only built once, for the UI
+CARD_LABELS = [f"{RANKS[card // 4]}{SUITS[card % 4]}" for card in range(DECK_SIZE)]
+
+# An ordered deck, copied (not rebuilt) whenever a fresh deck is needed
+ORDERED_DECK = array('B', range(DECK_SIZE))
+
+
+def card_label(card):
+    """Return the display text of a card, e.g. 'A♠' or '10♥'."""
+    return CARD_LABELS[card]
+
@@ -0,0 +1,113 @@
+from functools import lru_cache
+from types import MappingProxyType
+
+from cards import CARD_VALUES, DECK_SIZE
+
+# A deck composition is a tuple of 10 counts indexed by card value - 1:
+# index 0 = Aces, 1-8 = twos to nines, 9 = tens and face cards.
+COMPOSITION_SIZE = 10
+
+DEALER_OUTCOMES = ["17", "18", "19", "20", "21", "bust"]
+# Extra key of dealer_distribution: the part of "bust" that ends on exactly
+# 22, which pushes instead under the push-on-22 rule
+DEALER_22 = "22"
+
+# Composition index of every card number (Aces are worth 11 in CARD_VALUES)
+CARD_INDEX = bytes(0 if value == 11 else value - 1 for value in CARD_VALUES)
+
+
+def composition_of(cards):
+    """Count a sequence of card numbers (0-51) into a composition tuple."""
+    counts = [0] * COMPOSITION_SIZE
+    for card in cards:
+        counts[CARD_INDEX[card]] += 1
+    return tuple(counts)
+
+
+FULL_DECK = composition_of(range(DECK_SIZE))
+
+
+def shoe_composition(num_decks):
+    return tuple(count * num_decks for count in FULL_DECK)
+
+
+def remove_card(composition, index):
+    counts = list(composition)
+    counts[index] -= 1
+    return tuple(counts)
+
+
+@lru_cache(maxsize=500_000)
+def dealer_final(composition, hard_total, has_ace, hit_soft_17=False):
+    """
+    Probability of each dealer outcome (17, 18, 19, 20, 21, exactly 22,
+    over 22) from a dealer hand with the given hard total (Aces as 1) and Ace flag,
+    drawing from composition. Follows Game21.play_dealer_turn: hit below
+    17, stand on every 17 including soft 17 unless hit_soft_17.
+    """
+    soft = has_ace and hard_total <= 11
+    total = hard_total + 10 if soft else hard_total
+    if total > 21:
+        result = [0.0] * 7
+        result[5 if total == 22 else 6] = 1.0
+        return tuple(result)
+    if total >= 17 and not (hit_soft_17 and soft and total == 17):
+        result = [0.0] * 7
+        result[total - 17] = 1.0
+        return tuple(result)
+
+    remaining = sum(composition)
+    if remaining == 0:
+        # The shoe ran dry; Shoe.draw reshuffles, approximated by a fresh deck
+        composition, remaining = FULL_DECK, DECK_SIZE
+
+    result = [0.0] * 7
+    for index, count in enumerate(composition):
+        if count:
+            probability = count / remaining
+            branch = dealer_final(remove_card(composition, index),
+                                  hard_total + index + 1, has_ace or index == 0, hit_soft_17)
+            for outcome in range(7):
+                result[outcome] += probability * branch[outcome]
+    return tuple(result)
+
+
+@lru_cache(maxsize=100_000)
+def dealer_distribution(upcard_value, composition, hit_soft_17=False):
+    """
+    Exact distribution of the dealer's final result given the upcard value
+    (2-11, Ace = 11) and the composition of the cards the dealer can still
+    draw, including the hidden card. Returns a dictionary keyed by
+    DEALER_OUTCOMES, where "bust" is every total over 21, plus DEALER_22.
+    The mapping is cached and shared between callers, so it is read-only.
+    """
+    is_ace = upcard_value == 11
+    hard_total = 1 if is_ace else upcard_value
+    final = dealer_final(composition, hard_total, is_ace, hit_soft_17)
+    distribution = dict(zip(DEALER_OUTCOMES, final[:5]))
+    distribution["bust"] = final[5] + final[6]
+    distribution[DEALER_22] = final[5]
+    return MappingProxyType(distribution)
+
+
+def cache_info():
+    """Hit/miss counters of both caches, for tuning the cache sizes."""
+    return {'dealer_final': dealer_final.cache_info(),
+            'dealer_distribution': dealer_distribution.cache_info()}
+
+
+def unseen_composition(game):
+    """
+    Composition of the cards the player has not seen in a Game21: the undealt
+    part of the shoe plus the dealer's hidden card until it is revealed.
+    """
+    unseen = game.deck[game.deck_position:]
+    if not game.dealer_hidden_revealed and len(game.dealer_hand):
+        unseen.append(game.dealer_hand[0])
+    return composition_of(unseen)
+
+
+def game_dealer_distribution(game):
+    """Dealer outcome distribution for the current round of a Game21, as the player sees it."""
+    return dealer_distribution(game.card_value(game.dealer_hand[1]), unseen_composition(game),
+                               game.rules.hit_soft_17)
@@ -1,14 +1,233 @@
+import hashlib
+import os
 import random
+from array import array
+from typing import NamedTuple
+
+from cards import CARD_VALUES, CARD_IS_ACE, ORDERED_DECK
+from rules import RuleConfig
+from stats import StreamingStats
+
+# Round outcome codes, so headless code can count results without parsing text
+PLAYER_BUST = 0
+DEALER_BUST = 1
+PLAYER_WIN = 2
+DEALER_WIN = 3
+PUSH = 4
+
+OUTCOME_NAMES = ["player_bust", "dealer_bust", "player_win", "dealer_win", "push"]
+
+OUTCOME_MESSAGES = [
+    "Player busts. Dealer wins!",
+    "Dealer busts. Player wins!",
+    "Player wins!",
+    "Dealer wins!",
+    "Push (tie).",
+]
+
+# Messages for results that only exist under some rules (see rules.py)
+PLAYER_NATURAL_MESSAGE = "Blackjack! Player wins!"
+DEALER_NATURAL_MESSAGE = "Dealer has Blackjack. Dealer wins!"
+BOTH_NATURAL_MESSAGE = "Both have Blackjack. Push."
+PUSH_22_MESSAGE = "Dealer has 22. Push."
+
+
+class Hand:
+    """
+    A hand of cards that keeps its totals up to date as cards are added.
+
+    hard_total counts every Ace as 1 and aces counts the Aces in the hand,
+    so the best total, soft/hard and bust checks are all O(1).
+    """
+
+    __slots__ = ("cards", "hard_total", "aces")
+
+    def __init__(self, cards=()):
+        self.cards = array('B')
+        self.hard_total = 0
+        self.aces = 0
+        for card in cards:
+            self.append(card)
+
+    def append(self, card):
+        # Aces are stored as 1 here; total() upgrades one of them to 11 if it fits
+        self.cards.append(card)
+        is_ace = CARD_IS_ACE[card]
+        self.hard_total += CARD_VALUES[card] - 10 * is_ace
+        self.aces += is_ace
+
+    def is_soft(self):
+        # One Ace can still count as 11 without busting
+        return self.aces > 0 and self.hard_total <= 11
+
+    def total(self):
+        if self.aces and self.hard_total <= 11:
+            return self.hard_total + 10
+        return self.hard_total
+
+    def is_bust(self):
+        return self.hard_total > 21
+
+    def is_natural(self):
+        # A two-card 21: an Ace and a ten-valued card
+        return len(self.cards) == 2 and self.aces == 1 and self.hard_total == 11
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+    def __getitem__(self, index):
+        return self.cards[index]
+
+    def __repr__(self):
+        return f"Hand({list(self.cards)})"
+
+
+def new_seed():
+    """Pick a fresh 64-bit seed from the operating system's entropy source."""
+    return int.from_bytes(os.urandom(8), "big")
+
+
+def spawn_seeds(seed, count):
+    """
+    Derive count child seeds from a parent seed for worker processes.
+
+    Child i is a 256-bit hash of (seed, i), so the children are independent
+    of each other and of the parent stream, and the same parent seed always
+    gives the same children. Each child can seed a random.Random or a NumPy
+    Generator.
+    """
+    return [int.from_bytes(hashlib.blake2b(f"{seed}:{i}".encode(), digest_size=32).digest(), "big")
+            for i in range(count)]
+
+
+def make_randbelow(rng):
+    """
+    Return a function n -> random int in [0, n) that draws from rng.
+
+    rng can be the random module, a random.Random instance or a NumPy
+    Generator (e.g. numpy.random.Generator(numpy.random.PCG64(seed))).
+    """
+    if hasattr(rng, "integers"):
+        integers = rng.integers
+        return lambda n: int(integers(n))
+    if isinstance(rng, random.Random):
+        # The same unbiased routine random.shuffle uses, without randrange's
+        # argument checking
+        return rng._randbelow
+    return rng.randrange
+
+
+class Shoe:
+    """
+    One or more decks dealt with a moving pointer.
+
+    The shoe is shuffled lazily: draw() swaps a random undealt card into
+    the pointer position (one Fisher-Yates step), so a round only costs as
+    many random numbers as cards dealt, and every undealt card is equally
+    likely to come next. Once the pointer passes the cut card
+    (penetration = fraction of the shoe dealt before reshuffling) the next
+    round starts with a reshuffle, which only has to rewind the pointer.
+    The cut card is never placed so deep that the initial four cards of a
+    round cannot be dealt.
+    """
+
+    def __init__(self, num_decks=1, penetration=0.75, rng=None):
+        self.num_decks = num_decks
+        self.penetration = penetration
+        self.rng = rng if rng is not None else random.Random()
+        self._randbelow = make_randbelow(self.rng)
+        self.cards = ORDERED_DECK * num_decks
+        self.cut_card = min(int(len(self.cards) * penetration), len(self.cards) - 4)
+        self.reshuffles = 0
+        # Like reshuffles, but never reset, so snapshots can tell shuffles apart
+        self.generation = 0
+        self.position = 0
+
+    def reshuffle(self):
+        # All cards become undealt again; draw() does the actual shuffling
+        self.position = 0
+        self.reshuffles += 1
+        self.generation += 1
+
+    def needs_reshuffle(self):
+        return self.position >= self.cut_card
+
+    def draw(self):
+        cards = self.cards
+        # A very long round can run past the end of a small shoe; reshuffle
+        # the whole shoe then rather than failing mid-round
+        if self.position == len(cards):
+            self.reshuffle()
+        position = self.position
+        swap = position + self._randbelow(len(cards) - position)
+        card = cards[swap]
+        cards[swap] = cards[position]
+        cards[position] = card
+        self.position = position + 1
+        return card
+
+    def remaining(self):
+        return len(self.cards) - self.position
+
+
+class RoundSnapshot(NamedTuple):
+    """
+    Immutable state of a round, made by Game21.snapshot.
+
+    cards is the shoe's own card buffer, shared rather than copied. That is
+    safe because the lazy shuffle only ever swaps cards at or after the deal
+    pointer: whatever is drawn later, cards[position:] plus the cards drawn
+    since still hold the same multiset of unseen cards, so the snapshot can
+    be restored until the next reshuffle. Hands are tuples of card numbers.
+    """
+    cards: array
+    position: int
+    generation: int
+    player: tuple
+    dealer: tuple
+    dealer_hidden_revealed: bool
+
+    def unseen_cards(self):
+        """Card numbers the player has not seen: the undealt shoe plus the hidden card."""
+        unseen = self.cards[self.position:]
+        if not self.dealer_hidden_revealed and self.dealer:
+            unseen.append(self.dealer[0])
+        return unseen
 
 
 class Game21:
-    def __init__(self):
+    def __init__(self, num_decks=1, penetration=0.75, rng=None, seed=None, round_log=None,
+                 recorder=None, rules=None):
+        # Table rules (rules.RuleConfig); when given, they also set the deck count
+        if rules is None:
+            rules = RuleConfig(num_decks=num_decks)
+        self.rules = rules
+        self.compiled_rules = rules.compile()
+        # Each game has its own random stream. Without an injected rng it is
+        # seeded explicitly, so the seed can be saved to replay the game.
+        if rng is None:
+            if seed is None:
+                seed = new_seed()
+            rng = random.Random(seed)
+        self.seed = seed
+        self.rng = rng
+        # The shoe persists across rounds and is only reshuffled at the cut card
+        self.shoe = Shoe(rules.num_decks, penetration, rng)
+        # Optional replay.Session that records every round for replay
+        self.recorder = recorder
         # Start immediately with a fresh round
         self.new_round()
         # Statistics tracking for additional feature
         self.player_wins = 0
         self.dealer_wins = 0
         self.pushes = 0
+        # Rates, confidence intervals, histograms and streaks
+        self.stats = StreamingStats()
+        # Optional round_log.RoundLog that keeps every finished round on disk
+        self.round_log = round_log
 
     # ROUND MANAGEMENT
 
@@ -16,21 +235,20 @@ class Game21:
         """
         Prepares for a new round
         Suggested process:
-        - Create and shuffle a new deck
-        - Reset card pointer
+        - Reshuffle the shoe if the cut card has been reached
         - Empty both hands
         - Reset whether the dealer's hidden card has been revealed
         """
-        self.deck = self.create_deck()
-        random.shuffle(self.deck)
-
-        # Instead of removing cards from the deck,
-        # we keep an index of the "next card" to deal.
-        self.deck_position = 0
+        # Instead of removing cards from the shoe,
+        # it keeps an index of the "next card" to deal.
+        if self.recorder is not None:
+            self.recorder.end_round()
+        if self.shoe.needs_reshuffle():
+            self.shoe.reshuffle()
 
         # Hands start empty; cards will be dealt after UI calls deal_initial_cards()
-        self.player_hand = []
-        self.dealer_hand = []
+        self.player_hand = Hand()
+        self.dealer_hand = Hand()
 
         # The first dealer card starts hidden until Stand is pressed
         self.dealer_hidden_revealed = False
@@ -39,52 +257,69 @@ class Game21:
         """
         Deal two cards each to player and dealer.
         """
-        self.player_hand = [self.draw_card(), self.draw_card()]
-        self.dealer_hand = [self.draw_card(), self.draw_card()]
+        self.player_hand = Hand((self.draw_card(), self.draw_card()))
+        self.dealer_hand = Hand((self.draw_card(), self.draw_card()))
+        if self.recorder is not None:
+            self.recorder.start_round()
+
+    def snapshot(self):
+        """Capture the round in O(1): the shoe buffer is shared, not copied."""
+        return RoundSnapshot(self.shoe.cards, self.shoe.position, self.shoe.generation,
+                             tuple(self.player_hand.cards), tuple(self.dealer_hand.cards),
+                             self.dealer_hidden_revealed)
+
+    def restore(self, snapshot):
+        """
+        Rewind the round to a snapshot, so another line of play can be tried
+        from the same unseen cards (dealt in a fresh random order). Only
+        possible until the shoe is reshuffled; statistics are not touched.
+        """
+        shoe = self.shoe
+        if snapshot.cards is not shoe.cards or snapshot.generation != shoe.generation:
+            raise ValueError("snapshot is not from this shoe or the shoe was reshuffled since")
+        shoe.position = snapshot.position
+        self.player_hand = Hand(snapshot.player)
+        self.dealer_hand = Hand(snapshot.dealer)
+        self.dealer_hidden_revealed = snapshot.dealer_hidden_revealed
 
     # DECK AND CARD DRAWING
 
     def create_deck(self):
         """
-        Create a standard 52-card deck represented as text strings, e.g.:
-        'A♠', '10♥', 'K♦'.
-
-        Ranks: A, 2–10, J, Q, K
-        Suits: spades, hearts, diamonds, clubs (with unicode symbols)
+        Create a standard 52-card deck as a compact byte array of card
+        numbers 0-51 (see cards.py). The UI turns them into text such as
+        'A♠', '10♥', 'K♦' only when it displays them.
         """
-        ranks = ["A"] + [str(n) for n in range(2, 11)] + ["J", "Q", "K"]
-        suits = ["♠", "♥", "♦", "♣"]
-        return [f"{rank}{suit}" for rank in ranks for suit in suits]
+        return ORDERED_DECK[:]
 
     def draw_card(self):
         """
-        Return the next card in the shuffled deck.
+        Return the next card in the shoe.
         """
-        card = self.deck[self.deck_position]
-        self.deck_position += 1
-        return card
+        return self.shoe.draw()
+
+    @property
+    def deck(self):
+        # The cards of the shoe; cards from deck_position on are the undealt ones
+        # (in no meaningful order, the next card is picked when it is drawn)
+        return self.shoe.cards
+
+    @property
+    def deck_position(self):
+        return self.shoe.position
 
     # HAND VALUES + ACE HANDLING
 
     def card_value(self, card):
         """
-        Convert a card string into its numeric value.
+        Look up the numeric value of a card.
 
         Rules:
         - Number cards = their number (2–10)
         - J, Q, K = 10
         - A is normally 11, may later count as 1 if needed
         """
-        rank = card[:-1]  # everything except the suit symbol
-
-        if rank in ["J", "Q", "K"]:
-            return 10
-
-        if rank == "A":
-            return 11  # Initially treat Ace as 11
-
-        # Otherwise it's a number from 2 to 10
-        return int(rank)
+        return CARD_VALUES[card]
 
     def hand_total(self, hand):
         """
@@ -99,12 +334,10 @@ class Game21:
         total = 0
         ace_count = 0
 
-        # Calculate initial total and count aces
+        # Calculate initial total and count aces using the lookup tables
         for card in hand:
-            value = self.card_value(card)
-            total += value
-            if card[:-1] == "A":
-                ace_count += 1
+            total += CARD_VALUES[card]
+            ace_count += CARD_IS_ACE[card]
 
         # Adjust for aces if busting
         # Convert aces from 11 to 1 by subtracting 10
@@ -120,11 +353,13 @@ class Game21:
         # Add one card to the player's hand and return it, so the UI can display the card
         new_card = self.draw_card()
         self.player_hand.append(new_card)
+        if self.recorder is not None:
+            self.recorder.action("H")
         return new_card
 
     def player_total(self):
-        # Return the player's total
-        return self.hand_total(self.player_hand)
+        # Return the player's total (kept up to date by the Hand, no recount)
+        return self.player_hand.total()
 
     # DEALER ACTIONS
 
@@ -133,16 +368,78 @@ class Game21:
         self.dealer_hidden_revealed = True
 
     def dealer_total(self):
-        # Return the dealer's total
-        return self.hand_total(self.dealer_hand)
+        # Return the dealer's total (kept up to date by the Hand, no recount)
+        return self.dealer_hand.total()
+
+    def dealer_should_hit(self):
+        # Dealer hits until 17 or more (and on soft 17 under H17), from the compiled rule table
+        hand = self.dealer_hand
+        return self.compiled_rules.dealer_hits[hand.hard_total * 2 + (hand.aces > 0)] == 1
+
+    def dealer_hit(self):
+        # Add one card to the dealer's hand and return it, so the UI can show
+        # the dealer's draws one at a time
+        new_card = self.draw_card()
+        self.dealer_hand.append(new_card)
+        if self.recorder is not None:
+            self.recorder.action("D")
+        return new_card
 
     def play_dealer_turn(self):
-        # Dealer must hit until their total is 17 or more, then stand
-        while self.dealer_total() < 17:
-            self.dealer_hand.append(self.draw_card())
+        # Play the whole dealer turn at once (headless use)
+        dealer_hand = self.dealer_hand
+        dealer_hits = self.compiled_rules.dealer_hits
+        while dealer_hits[dealer_hand.hard_total * 2 + (dealer_hand.aces > 0)]:
+            dealer_hand.append(self.draw_card())
+
+    def settled_at_deal(self):
+        """
+        True when the rules end the round straight after the deal: a player
+        natural, or a dealer natural found by the dealer's peek.
+        """
+        rules = self.compiled_rules
+        if not rules.naturals:
+            return False
+        return self.player_hand.is_natural() or (rules.dealer_peek and self.dealer_hand.is_natural())
 
     # WINNER DETERMINATION
 
+    def round_outcome(self):
+        """
+        Return the outcome code of the round without touching the statistics.
+        Player bust is checked first, so it loses even if the dealer also busts.
+        """
+        # Check for player bust
+        if self.player_hand.is_bust():
+            return PLAYER_BUST
+
+        rules = self.compiled_rules
+        # Naturals beat every other hand and push with each other
+        if rules.naturals:
+            player_natural = self.player_hand.is_natural()
+            dealer_natural = self.dealer_hand.is_natural()
+            if player_natural or dealer_natural:
+                if player_natural and dealer_natural:
+                    return PUSH
+                return PLAYER_WIN if player_natural else DEALER_WIN
+
+        # Check for dealer bust
+        if self.dealer_hand.is_bust():
+            if self.dealer_hand.hard_total == rules.push_total:
+                return PUSH
+            return DEALER_BUST
+
+        player_score = self.player_hand.total()
+        dealer_score = self.dealer_hand.total()
+
+        # Both have valid hands, compare totals
+        if player_score > dealer_score:
+            return PLAYER_WIN
+        elif dealer_score > player_score:
+            return DEALER_WIN
+        else:
+            return PUSH
+
     def decide_winner(self):
         # Decide the outcome of the round
         """
@@ -152,30 +449,51 @@ class Game21:
         - "Player wins!"
         - "Dealer wins!"
         - "Push (tie)."
+        Some rules add messages for naturals and for a dealer 22 push.
         """
-        player_score = self.player_total()
-        dealer_score = self.dealer_total()
-
-        # Check for player bust
-        if player_score > 21:
-            self.dealer_wins += 1
-            return "Player busts. Dealer wins!"
-
-        # Check for dealer bust
-        if dealer_score > 21:
-            self.player_wins += 1
-            return "Dealer busts. Player wins!"
+        outcome = self.round_outcome()
 
-        # Both have valid hands, compare totals
-        if player_score > dealer_score:
+        if outcome in (DEALER_BUST, PLAYER_WIN):
             self.player_wins += 1
-            return "Player wins!"
-        elif dealer_score > player_score:
+        elif outcome in (PLAYER_BUST, DEALER_WIN):
             self.dealer_wins += 1
-            return "Dealer wins!"
         else:
             self.pushes += 1
-            return "Push (tie)."
+
+        # The dealer's hand only counts as played when the player stood
+        self.stats.record(outcome, self.player_hand.total(),
+                          None if outcome == PLAYER_BUST else self.dealer_hand.total(),
+                          CARD_VALUES[self.dealer_hand[1]], self.round_payout(outcome))
+        if self.round_log is not None:
+            self.round_log.append(outcome, self.player_hand, self.dealer_hand)
+        if self.recorder is not None:
+            self.recorder.action(str(outcome))
+
+        return self.round_message(outcome)
+
+    def round_payout(self, outcome):
+        """Bets won (negative when lost) for the outcome of this round."""
+        if outcome in (DEALER_BUST, PLAYER_WIN):
+            if self.compiled_rules.naturals and self.player_hand.is_natural():
+                return self.compiled_rules.natural_payout
+            return 1
+        if outcome == PUSH:
+            return 0
+        return -1
+
+    def round_message(self, outcome):
+        if self.compiled_rules.naturals and outcome != PLAYER_BUST:
+            player_natural = self.player_hand.is_natural()
+            dealer_natural = self.dealer_hand.is_natural()
+            if player_natural and dealer_natural:
+                return BOTH_NATURAL_MESSAGE
+            if player_natural:
+                return PLAYER_NATURAL_MESSAGE
+            if dealer_natural:
+                return DEALER_NATURAL_MESSAGE
+        if outcome == PUSH and self.dealer_hand.hard_total == self.compiled_rules.push_total:
+            return PUSH_22_MESSAGE
+        return OUTCOME_MESSAGES[outcome]
 
     # STATISTICS METHODS (Additional Feature)
     def get_statistics(self):
@@ -185,11 +503,14 @@ class Game21:
             'player_wins': self.player_wins,
             'dealer_wins': self.dealer_wins,
             'pushes': self.pushes,
-            'total_games': total_games
+            'total_games': total_games,
+            'reshuffles': self.shoe.reshuffles
         }
 
     def reset_statistics(self):
         """Reset all game statistics to zero"""
         self.player_wins = 0
         self.dealer_wins = 0
-        self.pushes = 0
\ No newline at end of file
+        self.pushes = 0
+        self.stats = StreamingStats()
+        self.shoe.reshuffles = 0
\ No newline at end of file
@@ -0,0 +1,237 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+
+from dealer_odds import dealer_final, remove_card, shoe_composition
+from rules import add_rule_arguments, as_rules, rules_from_args
+from simulation import POLICIES, TABLE_POLICIES, get_policy, simulate
+from stats import StreamingStats
+from strategy import CACHE_DIR, TABLE_SIZE, TOTALS, UPCARDS, table_index
+
+
+# STRATEGIES AS TABLES
+
+def decision_table(policy):
+    """
+    Any policy as a strategy table layout (see strategy.py): every policy
+    only sees (total, soft, upcard), so this captures it exactly and gives
+    one thing to enumerate with and to hash.
+    """
+    decisions = getattr(policy, "decisions", None)
+    if decisions is not None:
+        return decisions
+    table = bytearray(TABLE_SIZE)
+    for soft in (False, True):
+        for total in range(TOTALS):
+            for upcard in range(2, 2 + UPCARDS):
+                table[table_index(total, soft, upcard)] = bool(policy(total, soft, upcard))
+    return bytes(table)
+
+
+def strategy_hash(decisions):
+    return hashlib.blake2b(decisions, digest_size=8).hexdigest()
+
+
+# ENUMERATION
+
+class HouseEdge:
+    """
+    Exact expected return of one round played off the top of a fresh shoe
+    under a fixed strategy.
+
+    The deal is enumerated card value by card value in Game21's order (two
+    player cards, the hole card, the upcard) with the probability of each
+    value in the remaining composition, so every ordering of the same cards
+    is covered once instead of once per card. The player's draws follow the
+    decision table; when the player stands, dealer_odds.dealer_final gives
+    the dealer's exact final distribution from the cards left. Player states
+    are memoised by (composition, hand, dealer hand).
+    """
+
+    def __init__(self, decisions, rules=None):
+        self.decisions = decisions
+        self.rules = as_rules(rules)
+        self.compiled = self.rules.compile()
+        self.memo = {}
+
+    def stand(self, composition, total, dealer_hard, dealer_ace):
+        """(ev, win, push, loss) of standing on total."""
+        final = dealer_final(composition, dealer_hard, dealer_ace, self.rules.hit_soft_17)
+        win = push = 0.0
+        for dealer_total, probability in zip(range(17, 22), final):
+            if total > dealer_total:
+                win += probability
+            elif total == dealer_total:
+                push += probability
+        win += final[6]
+        if self.compiled.push_total:
+            push += final[5]
+        else:
+            win += final[5]
+        loss = 1.0 - win - push
+        return (win - loss, win, push, loss)
+
+    def play(self, composition, hard, has_ace, upcard, dealer_hard, dealer_ace):
+        """(ev, win, push, loss) of the player's hand from here on."""
+        key = (composition, hard, has_ace, upcard, dealer_hard, dealer_ace)
+        known = self.memo.get(key)
+        if known is not None:
+            return known
+
+        soft = has_ace and hard <= 11
+        total = hard + 10 if soft else hard
+        remaining = sum(composition)
+        if not (remaining and self.decisions[table_index(total, soft, upcard)]):
+            result = self.stand(composition, total, dealer_hard, dealer_ace)
+        else:
+            ev = win = push = loss = 0.0
+            for index, count in enumerate(composition):
+                if not count:
+                    continue
+                probability = count / remaining
+                new_hard = hard + index + 1
+                if new_hard > 21:
+                    ev -= probability
+                    loss += probability
+                    continue
+                branch = self.play(remove_card(composition, index), new_hard,
+                                   has_ace or index == 0, upcard, dealer_hard, dealer_ace)
+                ev += probability * branch[0]
+                win += probability * branch[1]
+                push += probability * branch[2]
+                loss += probability * branch[3]
+            result = (ev, win, push, loss)
+        self.memo[key] = result
+        return result
+
+    def settle_deal(self, composition, player, hidden, upcard):
+        """(ev, win, push, loss) once both hands are dealt, given as composition indexes."""
+        player_hard = player[0] + player[1] + 2
+        player_ace = 0 in player
+        dealer_hard = hidden + upcard + 2
+        dealer_ace = hidden == 0 or upcard == 0
+        upcard_value = 11 if upcard == 0 else upcard + 1
+
+        if self.compiled.naturals:
+            player_natural = player_ace and player_hard == 11
+            dealer_natural = dealer_ace and dealer_hard == 11
+            if player_natural and dealer_natural:
+                return (0.0, 0.0, 1.0, 0.0)
+            if player_natural:
+                return (self.compiled.natural_payout, 1.0, 0.0, 0.0)
+            if dealer_natural:
+                # Beats every other hand, with or without the peek
+                return (-1.0, 0.0, 0.0, 1.0)
+        return self.play(composition, player_hard, player_ace, upcard_value, dealer_hard, dealer_ace)
+
+    def evaluate(self):
+        """Enumerate every deal; returns the probability-weighted (ev, win, push, loss)."""
+        totals = [0.0, 0.0, 0.0, 0.0]
+
+        def deal(composition, dealt, probability):
+            if len(dealt) == 4:
+                first, second, hidden, upcard = dealt
+                result = self.settle_deal(composition, (first, second), hidden, upcard)
+                for i in range(4):
+                    totals[i] += probability * result[i]
+                return
+            remaining = sum(composition)
+            for index, count in enumerate(composition):
+                if count:
+                    deal(remove_card(composition, index), dealt + (index,),
+                         probability * count / remaining)
+
+        deal(shoe_composition(self.rules.num_decks), (), 1.0)
+        return tuple(totals)
+
+
+# ON-DISK CACHE
+
+def cache_key(rules, decisions):
+    return f"{as_rules(rules).key()}-{strategy_hash(decisions)}"
+
+
+def cache_path(key):
+    return os.path.join(CACHE_DIR, f"house-edge-{key}.json")
+
+
+def house_edge(policy, rules=None, use_cache=True):
+    """
+    Exact result of one round off the top of a fresh shoe for a policy under
+    rules: {'ev', 'house_edge', 'win', 'push', 'loss', 'seconds', 'key',
+    'cached'}. Results are cached on disk by rule set and strategy hash.
+    """
+    rules = as_rules(rules)
+    decisions = decision_table(policy)
+    key = cache_key(rules, decisions)
+    path = cache_path(key)
+    if use_cache:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            result['cached'] = True
+            return result
+        except FileNotFoundError:
+            pass
+
+    start = time.perf_counter()
+    ev, win, push, loss = HouseEdge(decisions, rules).evaluate()
+    result = {
+        'key': key,
+        'ev': ev,
+        'house_edge': -ev,
+        'win': win,
+        'push': push,
+        'loss': loss,
+        'seconds': time.perf_counter() - start,
+    }
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    result['cached'] = False
+    return result
+
+
+def monte_carlo(policy, rules, rounds, seed=0):
+    """
+    The same quantity from the simulation engine: penetration 0 puts the
+    cut card at the top, so every round starts from a fresh shoe. Returns
+    (mean return, 95% half-width).
+    """
+    stats = StreamingStats()
+    simulate(rounds, policy, seed, penetration=0.0, stats=stats, rules=rules)
+    low, high = stats.payout_interval()
+    return stats.mean_payout(), (high - low) / 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact house edge of a strategy")
+    parser.add_argument("--policy", choices=sorted(POLICIES) + TABLE_POLICIES, default="optimal")
+    parser.add_argument("--decks", type=int, default=1, help="number of decks in the shoe")
+    add_rule_arguments(parser)
+    parser.add_argument("--no-cache", action="store_true", help="recalculate even if cached")
+    parser.add_argument("--check", type=int, default=0, metavar="ROUNDS",
+                        help="cross-check against this many simulated rounds")
+    args = parser.parse_args()
+
+    rules = rules_from_args(args)
+    policy = get_policy(args.policy, rules)
+    result = house_edge(policy, rules, use_cache=not args.no_cache)
+    source = "from cache" if result['cached'] else f"in {result['seconds']:.2f}s"
+    print(f"{args.policy} under {rules.key()} ({source})")
+    print(f"  EV {result['ev']:+.6f} bets/round | house edge {result['house_edge']:.4%}")
+    print(f"  win {result['win']:.4%} | push {result['push']:.4%} | loss {result['loss']:.4%}")
+
+    if args.check:
+        mean, half = monte_carlo(policy, rules, args.check)
+        agrees = abs(mean - result['ev']) <= half
+        print(f"  Monte Carlo over {args.check} rounds: {mean:+.6f} ± {half:.6f} "
+              f"({'agrees' if agrees else 'outside the interval'}; "
+              f"{abs(mean - result['ev']) / (half / 1.96) if half else math.inf:.1f} sd)")
+
+
+if __name__ == '__main__':
+    main()
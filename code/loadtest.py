@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from server import DEFAULT_PORT, TableServer
+
+
+class Client:
+    """One connection to the table server, sending one request at a time."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.latencies = []
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None):
+        if unix_path:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, **request):
+        start = time.perf_counter()
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        reply = json.loads(await self.reader.readline())
+        self.latencies.append(time.perf_counter() - start)
+        if not reply['ok']:
+            raise RuntimeError(reply['error'])
+        return reply
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def play(client, tables, stop_at, limit=17):
+    """Play rounds at each of this client's tables in turn until stop_at."""
+    sessions = [None] * tables
+    while time.perf_counter() < stop_at:
+        for index, session in enumerate(sessions):
+            if session is None:
+                reply = await client.request(action='deal')
+                sessions[index] = session = reply['session']
+            else:
+                reply = await client.request(action='deal', session=session)
+            # Hit below limit, like simulation.stand_on
+            while reply['state'] == 'player_turn':
+                action = 'hit' if reply['player_total'] < limit else 'stand'
+                reply = await client.request(action=action, session=session)
+
+
+async def load_test(clients=100, tables=10, seconds=10.0, host="127.0.0.1", port=DEFAULT_PORT,
+                    unix_path=None, in_process=False):
+    """
+    Run clients concurrent connections, each playing tables tables, for
+    seconds. With in_process the server runs in this event loop. Returns
+    the number of actions, actions/sec and latency percentiles in ms.
+    """
+    if in_process:
+        table_server = TableServer()
+        server = await table_server.start(host, port, unix_path)
+
+    connections = [await Client.connect(host, port, unix_path) for _ in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(play(client, tables, start + seconds) for client in connections))
+    elapsed = time.perf_counter() - start
+    for client in connections:
+        await client.close()
+
+    if in_process:
+        table_server.evictor.cancel()
+        server.close()
+        await server.wait_closed()
+
+    latencies = [latency for client in connections for latency in client.latencies]
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        'actions': len(latencies),
+        'actions_per_sec': len(latencies) / elapsed,
+        'p50_ms': cuts[49] * 1000,
+        'p99_ms': cuts[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the Game of 21 table server")
+    parser.add_argument("--clients", type=int, default=100, help="concurrent connections")
+    parser.add_argument("--tables", type=int, default=10, help="tables played per connection")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH", help="connect over a Unix socket")
+    parser.add_argument("--in-process", action="store_true",
+                        help="start the server in this process instead of connecting to one")
+    args = parser.parse_args()
+
+    result = asyncio.run(load_test(args.clients, args.tables, args.seconds, args.host,
+                                   args.port, args.unix, args.in_process))
+    print(f"Tables: {args.clients * args.tables} on {args.clients} connections")
+    print(f"Actions: {result['actions']} ({result['actions_per_sec']:,.0f}/sec)")
+    print(f"Latency: p50 {result['p50_ms']:.2f} ms | p99 {result['p99_ms']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
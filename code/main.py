@@ -1,15 +1,168 @@
+import time
+#Taken before anything else is imported, for the startup report
+STARTUP_START = time.perf_counter()
+
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QLabel, QPushButton,
                              QVBoxLayout, QHBoxLayout, QWidget, QMessageBox,
-                             QDialog, QFrame, QScrollArea, QRadioButton, QButtonGroup)
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QFont
+                             QDialog, QFrame, QScrollArea, QRadioButton, QButtonGroup,
+                             QSizePolicy)
+from PyQt6.QtCore import (Qt, QTimer, QSize, QRectF, QObject, QRunnable, QThreadPool,
+                          pyqtSignal)
+from PyQt6.QtGui import QFont, QPixmap, QPainter, QPen, QColor
+import argparse
+import os
+import re
 import sys
+import threading
 
+from advisor import HintCancelled, cached_hint, compute_hint, hint_key
+from cards import card_label
 from game_logic import Game21
+from replay import ABANDONED, DEALER_HIT, HIT, iter_sessions, record_game, replay_game, save_session
+from round_log import RoundLog
+
+IMPORT_SECONDS = time.perf_counter() - STARTUP_START
+
+
+#Default place of the round log, kept between sessions
+DEFAULT_LOG_PATH = os.path.join(os.path.expanduser("~"), ".game21", "rounds.log")
+
+#Theme files live next to this module, so the app works from any working directory
+THEME_DIR = os.path.dirname(os.path.abspath(__file__))
+THEME_FILES = {
+    'light': 'light_theme.css',
+    'dark': 'dark_theme.css',
+    'high_contrast': 'high_contrast_theme.css',
+}
+#Card look when a theme has no #cardLabel rule: (text, background, border, border width, radius)
+DEFAULT_CARD_STYLE = ("#2c3e50", "white", "#34495e", 2, 6)
+
+
+#Round states, in the order a round goes through them
+DEALING = "dealing"
+PLAYER_TURN = "player_turn"
+DEALER_TURN = "dealer_turn"
+RESULT = "result"
+
+#Which states can follow each state (a new game can interrupt any round)
+ROUND_TRANSITIONS = {
+    None: {DEALING},
+    DEALING: {PLAYER_TURN},
+    PLAYER_TURN: {DEALER_TURN, RESULT, DEALING},
+    DEALER_TURN: {RESULT, DEALING},
+    RESULT: {DEALING},
+}
+
+#Delay between dealer draws, so the player can follow the dealer's turn
+DEALER_STEP_MS = 400
+
+
+class RoundStateMachine(QObject):
+    """Keeps track of which part of the round is running and signals every change"""
+
+    state_changed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.state = None
+
+    def set_state(self, state):
+        if state not in ROUND_TRANSITIONS[self.state]:
+            raise ValueError(f"Cannot go from {self.state} to {state}")
+        self.state = state
+        self.state_changed.emit(state)
+
+
+class HintSignals(QObject):
+    """Signals of a HintTask (a QRunnable cannot have its own)"""
+
+    finished = pyqtSignal(int, object)
+
+
+class HintTask(QRunnable):
+    """Works out one hint on a pool thread; cancel() stops it at the next check"""
+
+    def __init__(self, request_id, key):
+        super().__init__()
+        self.request_id = request_id
+        self.key = key
+        self.cancelled = threading.Event()
+        self.signals = HintSignals()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            hint = compute_hint(self.key, self.cancelled.is_set)
+        except HintCancelled:
+            return
+        self.signals.finished.emit(self.request_id, hint)
+
+
+class ThemeManager:
+    """Loads every theme once and caches the full stylesheet per (theme, font size)"""
+
+    def __init__(self, directory=THEME_DIR):
+        self.themes = {}
+        for theme, filename in THEME_FILES.items():
+            path = os.path.join(directory, filename)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.themes[theme] = f.read()
+            except FileNotFoundError:
+                print(f"Warning: Could not find {path}")
+                self.themes[theme] = ""
+        self.stylesheets = {}
+        self.card_styles = {}
+
+    def stylesheet(self, theme, font_size):
+        key = (theme, font_size)
+        if key not in self.stylesheets:
+            #The base font size goes in the same stylesheet, so a theme or font
+            #change is one setStyleSheet call (one repolish) instead of two.
+            #Rules in the theme files are more specific and still win.
+            self.stylesheets[key] = (f"QWidget {{ font-size: {font_size}pt; }}\n"
+                                     + self.themes.get(theme, ""))
+        return self.stylesheets[key]
+
+    def card_style(self, theme):
+        #Cards are painted, not styled widgets, so their look is read from the theme's #cardLabel rule
+        if theme not in self.card_styles:
+            self.card_styles[theme] = parse_card_style(self.themes.get(theme, ""))
+        return self.card_styles[theme]
+
+
+def parse_card_style(css):
+    #(text, background, border, border width, radius) from a #cardLabel rule, defaults for anything missing
+    color, background, border, border_width, radius = DEFAULT_CARD_STYLE
+    rule = re.search(r"#cardLabel\s*\{([^}]*)\}", css)
+    if rule is None:
+        return DEFAULT_CARD_STYLE
+    for declaration in rule.group(1).split(";"):
+        name, _, value = declaration.partition(":")
+        name = name.strip()
+        value = value.strip()
+        if name == "color":
+            color = value
+        elif name == "background-color":
+            background = value
+        elif name == "border":
+            #e.g. "2px solid #34495e"
+            match = re.match(r"(\d+)px\s+\w+\s+(\S+)", value)
+            if match:
+                border_width, border = int(match.group(1)), match.group(2)
+        elif name == "border-radius":
+            match = re.match(r"(\d+)px", value)
+            if match:
+                radius = int(match.group(1))
+    return (color, background, border, border_width, radius)
 
 
 class WelcomeOverlay(QWidget):
-    """Welcome overlay that displays at the start of each game"""
+    """Welcome overlay that displays at the start of each game - click to skip"""
+
+    skipped = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -35,11 +188,23 @@ class WelcomeOverlay(QWidget):
             padding: 10px;
         """)
 
+        skip_hint = QLabel("Click anywhere or press any key to start")
+        skip_hint.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        skip_hint.setStyleSheet("""
+            font-size: 11pt;
+            color: #bdc3c7;
+            padding: 10px;
+        """)
+
         layout.addWidget(welcome_label)
         layout.addWidget(subtitle)
+        layout.addWidget(skip_hint)
 
         self.setLayout(layout)
 
+    def mousePressEvent(self, event):
+        self.skipped.emit()
+
 
 class RulesDialog(QDialog):
     """Dialog displaying game rules with theme-appropriate styling"""
@@ -121,15 +286,16 @@ class ResultDialog(QDialog):
         layout = QVBoxLayout()
 
         #Result message label with object name for CSS styling
-        result_label = QLabel(result_message)
-        result_label.setObjectName("resultLabel")
-        result_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        result_label.setWordWrap(True)
+        self.result_label = QLabel()
+        self.result_label.setObjectName("resultLabel")
+        self.result_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.result_label.setWordWrap(True)
 
         #Score display label with object name for CSS styling
-        scores = QLabel(f"Your Total: {player_total}\nDealer Total: {dealer_total}")
-        scores.setObjectName("scoresLabel")
-        scores.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.scores = QLabel()
+        self.scores.setObjectName("scoresLabel")
+        self.scores.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.set_result(result_message, player_total, dealer_total)
 
         button_layout = QHBoxLayout()
 
@@ -172,12 +338,17 @@ class ResultDialog(QDialog):
         button_layout.addWidget(play_again_button)
         button_layout.addWidget(quit_button)
 
-        layout.addWidget(result_label)
-        layout.addWidget(scores)
+        layout.addWidget(self.result_label)
+        layout.addWidget(self.scores)
         layout.addLayout(button_layout)
 
         self.setLayout(layout)
 
+    def set_result(self, result_message, player_total, dealer_total):
+        #The dialog is built once and reused for every round
+        self.result_label.setText(result_message)
+        self.scores.setText(f"Your Total: {player_total}\nDealer Total: {dealer_total}")
+
 
 class SlidingSidebar(QFrame):
     """Sliding sidebar panel with game options"""
@@ -191,6 +362,8 @@ class SlidingSidebar(QFrame):
         layout.setContentsMargins(15, 15, 15, 15)
         layout.setSpacing(8)
 
+        self.rules_dialog = None
+
         rules_btn = QPushButton("View Rules")
         rules_btn.setObjectName("sidebarButton")
         rules_btn.clicked.connect(self.show_rules)
@@ -254,8 +427,10 @@ class SlidingSidebar(QFrame):
         self.setLayout(layout)
 
     def show_rules(self):
-        dialog = RulesDialog(self)
-        dialog.exec()
+        #Built on first use and kept for later
+        if self.rules_dialog is None:
+            self.rules_dialog = RulesDialog(self)
+        self.rules_dialog.exec()
 
     def request_new_game(self):
         #Shows confirmation dialog before starting new game
@@ -273,8 +448,185 @@ class SlidingSidebar(QFrame):
                 main_window.on_new_round()
 
 
+class CardPixmapCache:
+    """Pre-rendered card pixmaps keyed by card text, theme and font size"""
+
+    def __init__(self, theme_manager, theme='light', font_size=12):
+        #The theme files stay the one place card colors are set
+        self.theme_manager = theme_manager
+        self.pixmaps = {}
+        self.theme = theme
+        self.font_size = font_size
+
+    def set_style(self, theme, font_size):
+        #Only a real theme or font size change throws the cached pixmaps away
+        if (theme, font_size) != (self.theme, self.font_size):
+            self.theme = theme
+            self.font_size = font_size
+            self.pixmaps.clear()
+
+    def card_size(self):
+        #Cards scale with the font size; 12pt gives the 18pt cards of the old labels
+        scale = self.font_size / 12
+        return QSize(round(62 * scale), round(90 * scale))
+
+    def pixmap(self, text, ratio=1.0):
+        key = (text, self.theme, self.font_size, ratio)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is None:
+            pixmap = self.render(text, ratio)
+            self.pixmaps[key] = pixmap
+        return pixmap
+
+    def render(self, text, ratio):
+        color, background, border, border_width, radius = self.theme_manager.card_style(self.theme)
+        size = self.card_size()
+
+        pixmap = QPixmap(round(size.width() * ratio), round(size.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(QColor(border), border_width))
+        painter.setBrush(QColor(background))
+        inset = border_width / 2
+        painter.drawRoundedRect(QRectF(inset, inset, size.width() - border_width,
+                                       size.height() - border_width), radius, radius)
+
+        font = QFont()
+        font.setPointSizeF(self.font_size * 1.5)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(QColor(color))
+        painter.drawText(QRectF(0, 0, size.width(), size.height()),
+                         Qt.AlignmentFlag.AlignCenter, text)
+        painter.end()
+        return pixmap
+
+
+class HandWidget(QWidget):
+    """A whole hand painted in one widget from cached card pixmaps"""
+
+    SPACING = 8
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.cards = []
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+
+    def set_cards(self, texts):
+        #Only repaint when the hand actually changed
+        if texts == self.cards:
+            return
+        self.cards = list(texts)
+        self.updateGeometry()
+        self.update()
+
+    def style_changed(self):
+        #Called after the cache switched theme or font size
+        self.updateGeometry()
+        self.update()
+
+    def sizeHint(self):
+        size = self.cache.card_size()
+        count = max(len(self.cards), 1)
+        return QSize(count * size.width() + (count - 1) * self.SPACING, size.height())
+
+    def minimumSizeHint(self):
+        return QSize(0, self.cache.card_size().height())
+
+    def paintEvent(self, event):
+        if not self.cards:
+            return
+        size = self.cache.card_size()
+        ratio = self.devicePixelRatioF()
+        step = size.width() + self.SPACING
+        #Center the hand; resizing only moves the starting point
+        x = (self.width() - (len(self.cards) * step - self.SPACING)) // 2
+        y = (self.height() - size.height()) // 2
+
+        painter = QPainter(self)
+        for text in self.cards:
+            painter.drawPixmap(x, y, self.cache.pixmap(text, ratio))
+            x += step
+        painter.end()
+
+
+class ReplayDriver(QObject):
+    """
+    Plays a recorded session back through a MainWindow, one step per tick,
+    pressing the same buttons the player did. The dealer's cards are drawn
+    by the driver instead of the dealer timer, so an interrupted dealer turn
+    stops at the same card as in the recording.
+    """
+
+    def __init__(self, window, session):
+        super().__init__(window)
+        self.window = window
+        self.session = session
+        self.round = 0
+        self.position = 0
+        self.mismatches = 0
+        self.timer = QTimer(self)
+        self.timer.setInterval(DEALER_STEP_MS)
+        self.timer.timeout.connect(self.step)
+
+    def start(self):
+        self.timer.start()
+
+    def stand(self):
+        self.window.on_stand()
+        self.window.dealer_timer.stop()
+
+    def step(self):
+        window = self.window
+        rounds = self.session.rounds
+        if self.round >= len(rounds):
+            self.timer.stop()
+            window.set_hint_text(f"Replay finished: {len(rounds)} rounds, "
+                                 f"{self.mismatches} mismatches")
+            return
+        window.setWindowTitle(f"Game of 21 - replay round {self.round + 1}/{len(rounds)}")
+
+        trace = rounds[self.round]
+        if self.position == len(trace):
+            #The result has been on screen for a tick, move on
+            self.next_round()
+            return
+
+        code = trace[self.position]
+        state = window.round_state.state
+        if code == HIT:
+            window.on_hit()
+            self.position += 1
+        elif code == ABANDONED:
+            self.next_round()
+        elif state == PLAYER_TURN:
+            #A dealer card or the result means the player stood here
+            self.stand()
+        elif code == DEALER_HIT:
+            window.dealer_step()
+            self.position += 1
+        elif state == DEALER_TURN:
+            #Draw the rest of the dealer's cards one per tick
+            window.dealer_step()
+        else:
+            if window.game.round_outcome() != int(code):
+                self.mismatches += 1
+            self.position += 1
+
+    def next_round(self):
+        self.round += 1
+        self.position = 0
+        if self.round < len(self.session.rounds):
+            self.window.on_new_round()
+
+
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, welcome=True, startup_report=False, log_path=None, record_path=None,
+                 replay_session=None):
         super().__init__()
         self.setWindowTitle("Game of 21")
         self.setGeometry(200, 200, 1000, 700)
@@ -284,17 +636,70 @@ class MainWindow(QMainWindow):
         self.current_font_size = 12  #Default medium font
         self.current_theme = 'light'  #Start with light theme
         self.sidebar_visible = False  #Sidebar starts hidden
+        #Built the first time they are needed, not at startup
+        self.sidebar = None
+        self.result_dialog = None
+        self.startup_report = startup_report
 
         #Create game instance - handles all game logic
-        self.game = Game21()
+        #Every finished round is appended to the log, which outlives the window
+        self.round_log = self.open_round_log(log_path) if log_path else None
+        #A recorded session is saved when the window closes, a replayed one drives the window
+        self.record_path = record_path
+        self.session = None
+        if replay_session is not None:
+            self.game = replay_game(replay_session)
+        elif record_path:
+            self.game, self.session = record_game(round_log=self.round_log)
+        else:
+            self.game = Game21(round_log=self.round_log)
+        #All themes are read once here instead of on every theme click
+        self.theme_manager = ThemeManager()
+        #Card pixmaps shared by both hands
+        self.card_cache = CardPixmapCache(self.theme_manager, self.current_theme,
+                                          self.current_font_size)
+        self.applied_style = None
 
         #Initialize UI components
         self.initUI()
         #Apply initial theme styling
         self.apply_theme()
 
-        #Show welcome message after UI is ready (100ms delay)
-        QTimer.singleShot(100, self.show_welcome)
+        #The round is driven by state changes instead of nested dialog loops
+        self.round_state = RoundStateMachine(self)
+        self.round_state.state_changed.connect(self.enter_state)
+        #Dealer draws one card per timer tick
+        self.dealer_timer = QTimer(self)
+        self.dealer_timer.setInterval(DEALER_STEP_MS)
+        self.dealer_timer.timeout.connect(self.dealer_step)
+
+        #Hints are calculated one at a time, off the UI thread
+        self.hint_pool = QThreadPool(self)
+        self.hint_pool.setMaxThreadCount(1)
+        self.hint_task = None
+        #Increases whenever the game state changes, so stale hints are ignored
+        self.hint_request = 0
+
+        #Deal straight away; the welcome message only covers the table
+        self.new_round_setup()
+        if welcome:
+            QTimer.singleShot(0, self.show_welcome)
+        if startup_report:
+            #Runs once the event loop is idle, i.e. after the first paint
+            QTimer.singleShot(0, self.report_startup)
+        self.replay_driver = None
+        if replay_session is not None:
+            self.replay_driver = ReplayDriver(self, replay_session)
+            QTimer.singleShot(0, self.replay_driver.start)
+
+    def open_round_log(self, path):
+        """Open the round log, or play without one if it cannot be used."""
+        try:
+            return RoundLog(path)
+        except (ValueError, OSError) as error:
+            #An unreadable or unwritable log must never stop the game from starting
+            print(f"Warning: Not logging rounds, could not open {path}: {error}")
+            return None
 
     def initUI(self):
         central_widget = QWidget()
@@ -331,18 +736,8 @@ class MainWindow(QMainWindow):
         content_container_layout.setContentsMargins(0, 0, 0, 0)
         content_container_layout.setSpacing(0)
         content_container.setLayout(content_container_layout)
-
-        #Sidebar
-        self.sidebar = SlidingSidebar(content_container)
-        self.sidebar.hide()
-
-        for button in self.sidebar.font_button_group.buttons():
-            button.clicked.connect(lambda: self.change_font_size())
-
-        for button in self.sidebar.theme_button_group.buttons():
-            button.clicked.connect(lambda: self.change_theme())
-
-        content_container_layout.addWidget(self.sidebar)
+        #The sidebar is added here on first use (see ensure_sidebar)
+        self.content_container = content_container
 
         #Game area
         game_widget = QWidget()
@@ -397,6 +792,12 @@ class MainWindow(QMainWindow):
         self.playerCardsLayout.setSpacing(8)
         player_layout.addLayout(self.playerCardsLayout)
 
+        #Each hand is a single painted widget
+        self.dealer_cards = HandWidget(self.card_cache)
+        self.dealerCardsLayout.addWidget(self.dealer_cards)
+        self.player_cards = HandWidget(self.card_cache)
+        self.playerCardsLayout.addWidget(self.player_cards)
+
         player_section.setLayout(player_layout)
         game_layout.addWidget(player_section)
 
@@ -412,12 +813,24 @@ class MainWindow(QMainWindow):
         self.stand_button.setObjectName("standButton")
         self.stand_button.clicked.connect(self.on_stand)
 
+        self.hint_button = QPushButton("Hint")
+        self.hint_button.setObjectName("hintButton")
+        self.hint_button.clicked.connect(self.on_hint)
+
         button_layout.addStretch()
         button_layout.addWidget(self.hit_button)
         button_layout.addWidget(self.stand_button)
+        button_layout.addWidget(self.hint_button)
         button_layout.addStretch()
 
         game_layout.addLayout(button_layout)
+
+        #Expected value of hitting vs standing, filled in by on_hint
+        self.hint_label = QLabel("")
+        self.hint_label.setObjectName("hintLabel")
+        self.hint_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.hint_label.hide()
+        game_layout.addWidget(self.hint_label)
         game_layout.addStretch()
 
         content_container_layout.addWidget(game_widget, 1)
@@ -427,10 +840,27 @@ class MainWindow(QMainWindow):
         #Welcome overlay
         self.welcome_overlay = WelcomeOverlay(central_widget)
         self.welcome_overlay.setGeometry(central_widget.rect())
+        self.welcome_overlay.skipped.connect(self.hide_welcome)
         self.welcome_overlay.hide()
 
+    def ensure_sidebar(self):
+        #Build the sidebar and its radio buttons the first time the menu is opened
+        if self.sidebar is not None:
+            return
+        self.sidebar = SlidingSidebar(self.content_container)
+        self.sidebar.hide()
+
+        for button in self.sidebar.font_button_group.buttons():
+            button.clicked.connect(lambda: self.change_font_size())
+
+        for button in self.sidebar.theme_button_group.buttons():
+            button.clicked.connect(lambda: self.change_theme())
+
+        self.content_container.layout().insertWidget(0, self.sidebar)
+
     def toggle_sidebar(self):
         """Toggle sidebar visibility with animation"""
+        self.ensure_sidebar()
         if self.sidebar_visible:
             self.sidebar.hide()
             self.sidebar_visible = False
@@ -439,18 +869,47 @@ class MainWindow(QMainWindow):
             self.sidebar_visible = True
 
     def show_welcome(self):
+        if self.welcome_overlay is None:
+            return
         self.welcome_overlay.setGeometry(self.centralWidget().rect())
         self.welcome_overlay.show()
         self.welcome_overlay.raise_()
-        QTimer.singleShot(3000, self.start_game_after_welcome)
+        QTimer.singleShot(3000, self.hide_welcome)
 
-    def start_game_after_welcome(self):
+    def hide_welcome(self):
+        #Called by the timer or when the player skips; the round is already dealt
+        if self.welcome_overlay is None:
+            return
         self.welcome_overlay.hide()
         self.welcome_overlay.setParent(None)
         self.welcome_overlay.deleteLater()
         #Mark overlay as deleted to prevent access after deletion
         self.welcome_overlay = None
-        self.new_round_setup()
+
+    def keyPressEvent(self, event):
+        #Any key skips the welcome message
+        if self.welcome_overlay is not None and self.welcome_overlay.isVisible():
+            self.hide_welcome()
+        else:
+            super().keyPressEvent(event)
+
+    def report_startup(self):
+        self.startup_seconds = time.perf_counter() - STARTUP_START
+        print(f"Import time: {IMPORT_SECONDS * 1000:.1f} ms")
+        print(f"Time to first interactive: {self.startup_seconds * 1000:.1f} ms")
+
+    def closeEvent(self, event):
+        #Stop a running hint so the worker thread can finish
+        self.cancel_hint()
+        self.hint_pool.waitForDone()
+        #Write out the rounds still buffered
+        if self.round_log is not None:
+            self.round_log.close()
+        if self.session is not None:
+            self.session.finish(self.game)
+            save_session(self.record_path, self.session)
+            self.session = None
+        super().closeEvent(event)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
@@ -460,88 +919,133 @@ class MainWindow(QMainWindow):
 
     def on_hit(self):
         #Player requests another card
-        card = self.game.player_hit()
-        self.add_card(self.playerCardsLayout, card)
+        if self.round_state.state != PLAYER_TURN:
+            return
+        self.cancel_hint()
+        self.game.player_hit()
+        self.update_player_cards()
 
-        #Update displayed total
-        player_total = self.game.player_total()
-        self.player_total_label.setText(f"Total: {player_total}")
-
-        #Check if player busted (went over 21)
-        if player_total > 21:
-            #Reveal dealer cards and end round
-            self.reveal_all_and_end()
-            #Get result message from game logic
-            result = self.game.decide_winner()
-            #Update win/loss statistics
-            self.update_statistics()
-            #Show result dialog to player
-            self.show_result_dialog(result)
+        #Update displayed total (read from the hand's running total)
+        self.player_total_label.setText(f"Total: {self.game.player_total()}")
+
+        #Check if player busted (went over 21) - the round ends straight away
+        if self.game.player_hand.is_bust():
+            self.round_state.set_state(RESULT)
 
     def on_stand(self):
         #Player ends their turn - dealer now plays
+        if self.round_state.state != PLAYER_TURN:
+            return
+        self.round_state.set_state(DEALER_TURN)
+
+    def enter_state(self, state):
+        #Any hint belongs to the previous state
+        self.cancel_hint()
+
+        #Buttons only work during the player's turn
+        playing = state == PLAYER_TURN
+        self.hit_button.setEnabled(playing)
+        self.stand_button.setEnabled(playing)
+        self.hint_button.setEnabled(playing)
+
+        if state == DEALER_TURN:
+            #Reveal dealer's hidden card, then draw one card per timer step
+            self.game.reveal_dealer_card()
+            self.update_dealer_cards(full=True)
+            self.dealer_timer.start()
+        elif state == RESULT:
+            self.finish_round()
+
+    def on_hint(self):
+        #Expected value of hitting vs standing, from the cards the player has not seen
+        if self.round_state.state != PLAYER_TURN:
+            return
+        key = hint_key(self.game)
+        hint = cached_hint(key)
+        if hint is not None:
+            self.show_hint(hint)
+            return
+
+        self.cancel_hint()
+        self.hint_task = HintTask(self.hint_request, key)
+        self.hint_task.signals.finished.connect(self.on_hint_ready)
+        self.set_hint_text("Thinking...")
+        self.hint_pool.start(self.hint_task)
+
+    def on_hint_ready(self, request_id, hint):
+        #Drop answers for a state that has already changed
+        if request_id == self.hint_request:
+            self.hint_task = None
+            self.show_hint(hint)
+
+    def show_hint(self, hint):
+        stand_ev, hit_ev = hint
+        best = "Hit" if hit_ev > stand_ev else "Stand"
+        self.set_hint_text(f"Hit: {hit_ev:+.3f} | Stand: {stand_ev:+.3f} → {best}")
+
+    def cancel_hint(self):
+        if self.hint_task is not None:
+            self.hint_task.cancel()
+            self.hint_task = None
+        self.hint_request += 1
+        self.set_hint_text("")
+
+    def set_hint_text(self, text):
+        #The hint box is only shown while there is something in it
+        self.hint_label.setText(text)
+        self.hint_label.setVisible(bool(text))
+
+    def dealer_step(self):
+        #Dealer hits until 17+, one card per tick
+        if self.game.dealer_should_hit():
+            self.game.dealer_hit()
+            self.update_dealer_cards(full=True)
+        else:
+            self.dealer_timer.stop()
+            self.round_state.set_state(RESULT)
 
-        #Reveal dealer's hidden card
+    def finish_round(self):
+        #Reveal dealer cards (if the player busted they are still hidden)
         self.game.reveal_dealer_card()
         self.update_dealer_cards(full=True)
-
-        #Dealer automatically plays (hits until 17+)
-        self.game.play_dealer_turn()
-        #Update display with any new dealer cards
-        self.update_dealer_cards(full=True)
-
-        #Determine who won the round
+        #Get result message from game logic
         result = self.game.decide_winner()
         #Update win/loss/tie statistics
         self.update_statistics()
-        #Disable action buttons (round is over)
-        self.end_round()
-
         #Show result to player
         self.show_result_dialog(result)
 
     def on_new_round(self):
-        #Start a fresh round of the game
+        #Start a fresh round of the game, also when called in the middle of one
+        self.dealer_timer.stop()
+        if self.result_dialog is not None:
+            self.result_dialog.hide()
         self.game.new_round()
         self.new_round_setup()
 
     def show_result_dialog(self, result_message):
-        #Show result dialog at end of round with proper handling
+        #Show the result without blocking - the buttons' signals decide what happens next
         player_total = self.game.player_total()
         dealer_total = self.game.dealer_total()
 
-        dialog = ResultDialog(result_message, player_total, dealer_total, self)
-        result = dialog.exec()
-
-        if result == QDialog.DialogCode.Accepted:
+        if self.result_dialog is None:
+            self.result_dialog = ResultDialog(result_message, player_total, dealer_total, self)
             #User clicked "Play Another Round" - start new round
-            self.on_new_round()
-        else:
+            self.result_dialog.accepted.connect(self.on_new_round)
             #User clicked "Quit" - close application
-            QApplication.quit()
-
-    def clear_layout(self, layout):
-        while layout.count():
-            item = layout.takeAt(0)
-            widget = item.widget()
-            if widget is not None:
-                widget.setParent(None)
-                widget.deleteLater()
-
-    def add_card(self, layout, card_text):
-        label = QLabel(card_text)
-        label.setObjectName("cardLabel")
-        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(label)
+            self.result_dialog.rejected.connect(QApplication.quit)
+        else:
+            self.result_dialog.set_result(result_message, player_total, dealer_total)
+        self.result_dialog.open()
 
-    def update_dealer_cards(self, full=False):
-        self.clear_layout(self.dealerCardsLayout)
+    def update_player_cards(self):
+        self.player_cards.set_cards([card_label(card) for card in self.game.player_hand])
 
-        for i, card in enumerate(self.game.dealer_hand):
-            if i == 0 and not full:
-                self.add_card(self.dealerCardsLayout, "🂠")
-            else:
-                self.add_card(self.dealerCardsLayout, card)
+    def update_dealer_cards(self, full=False):
+        texts = [card_label(card) for card in self.game.dealer_hand]
+        if not full and texts:
+            texts[0] = "🂠"
+        self.dealer_cards.set_cards(texts)
 
         if full:
             self.dealer_total_label.setText(f"Total: {self.game.dealer_total()}")
@@ -549,53 +1053,40 @@ class MainWindow(QMainWindow):
             self.dealer_total_label.setText("Total: ?")
 
     def new_round_setup(self):
-        self.player_total_label.setText("Total: 0")
-        self.dealer_total_label.setText("Total: ?")
-
-        self.clear_layout(self.playerCardsLayout)
-        self.clear_layout(self.dealerCardsLayout)
-
+        self.round_state.set_state(DEALING)
         self.game.deal_initial_cards()
 
-        for card in self.game.player_hand:
-            self.add_card(self.playerCardsLayout, card)
-
+        self.update_player_cards()
         self.player_total_label.setText(f"Total: {self.game.player_total()}")
         self.update_dealer_cards(full=False)
 
-        self.hit_button.setEnabled(True)
-        self.stand_button.setEnabled(True)
-
-    def end_round(self):
-        self.hit_button.setEnabled(False)
-        self.stand_button.setEnabled(False)
-
-    def reveal_all_and_end(self):
-        self.game.reveal_dealer_card()
-        self.update_dealer_cards(full=True)
-        self.end_round()
+        self.round_state.set_state(PLAYER_TURN)
+        #Under some rules a natural ends the round straight after the deal
+        if self.game.settled_at_deal():
+            self.round_state.set_state(RESULT)
 
     def update_statistics(self):
         stats = self.game.get_statistics()
-        self.stats_label.setText(
+        text = (
             f"Games: {stats['total_games']} | "
             f"Player Wins: {stats['player_wins']} | "
             f"Dealer Wins: {stats['dealer_wins']} | "
             f"Ties: {stats['pushes']}"
         )
+        #Win rate with its 95% confidence interval, read from the running totals
+        running = self.game.stats
+        if running.rounds:
+            low, high = running.win_rate_interval()
+            text += f" | Win Rate: {running.win_rate():.0%} ({low:.0%}-{high:.0%})"
+        self.stats_label.setText(text)
 
     def change_font_size(self):
         """Change font size based on selection - properly updates all text"""
         selected = self.sidebar.font_button_group.checkedButton()
         if selected and hasattr(selected, 'size_value'):
             self.current_font_size = selected.size_value
-            #Create new font with selected size
-            app_font = QFont()
-            app_font.setPointSize(self.current_font_size)
-            #Apply to entire application
-            QApplication.instance().setFont(app_font)
-            #Force update of all widgets
-            self.update()
+            #The font size is part of the cached stylesheet, applied in one go
+            self.apply_theme()
 
     def change_theme(self):
         """Change theme based on selection - properly updates styling"""
@@ -605,25 +1096,52 @@ class MainWindow(QMainWindow):
             self.apply_theme()
 
     def apply_theme(self):
-        try:
-            if self.current_theme == 'light':
-                stylesheet_path = 'light_theme.css'
-            elif self.current_theme == 'dark':
-                stylesheet_path = 'dark_theme.css'
-            else:
-                stylesheet_path = 'high_contrast_theme.css'
+        style = (self.current_theme, self.current_font_size)
+        #Re-applying the same stylesheet would still repolish every widget
+        if style != self.applied_style:
+            self.setStyleSheet(self.theme_manager.stylesheet(*style))
+            self.applied_style = style
+        #Cards are painted, not styled, so they follow the theme separately
+        self.update_card_style()
 
-            with open(stylesheet_path, 'r', encoding='utf-8') as f:
-                stylesheet = f.read()
-                self.setStyleSheet(stylesheet)
-        except FileNotFoundError:
-            print(f"Warning: Could not find {stylesheet_path}")
+    def update_card_style(self):
+        self.card_cache.set_style(self.current_theme, self.current_font_size)
+        self.dealer_cards.style_changed()
+        self.player_cards.style_changed()
 
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Game of 21")
+    parser.add_argument("--no-welcome", action="store_true", help="skip the welcome message")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print import time and time to first interactive")
+    parser.add_argument("--log", default=DEFAULT_LOG_PATH,
+                        help="append every round to this binary log (read it with round_log.py)")
+    parser.add_argument("--no-log", action="store_true", help="do not keep a round log")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record this session and append it to PATH when the window closes")
+    parser.add_argument("--replay", metavar="PATH", help="play back a session recorded with --record")
+    parser.add_argument("--session", type=int, default=0,
+                        help="which session in the --replay file to play back (0 = first)")
+    #Anything not recognised here is passed on to Qt
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setAttribute(Qt.ApplicationAttribute.AA_DontShowIconsInMenus, False)
 
-    window = MainWindow()
+    replay_session = None
+    if args.replay:
+        for number, session in enumerate(iter_sessions(args.replay)):
+            if number == args.session:
+                replay_session = session
+                break
+        else:
+            parser.error(f"{args.replay} has no session {args.session}")
+
+    #Replayed rounds are not played again into the log
+    window = MainWindow(welcome=not args.no_welcome and replay_session is None,
+                        startup_report=args.startup_report,
+                        log_path=None if args.no_log or replay_session else args.log,
+                        record_path=args.record, replay_session=replay_session)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
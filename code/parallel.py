@@ -0,0 +1,87 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game_logic import new_seed, spawn_seeds
+from simulation import get_policy, simulate, summarise
+from rules import RuleConfig
+from stats import StreamingStats
+
+# Rounds per shard. Shards have a fixed size (not one per worker) so the
+# result for a given seed is the same whatever the worker count.
+SHARD_ROUNDS = 250_000
+
+
+def run_shard(rounds, policy_name, seed, num_decks, penetration, collect_stats=False,
+              rules=None):
+    """
+    Worker entry point: simulate one shard and return only a compact
+    aggregate, ([five outcome counts..., reshuffles, naturals],
+    StreamingStats or None).
+    """
+    rules = RuleConfig(num_decks=num_decks) if rules is None else rules
+    stats = StreamingStats() if collect_stats else None
+    result = simulate(rounds, get_policy(policy_name, rules), seed, num_decks, penetration,
+                      stats=stats, rules=rules)
+    return list(result['outcomes'].values()) + [result['reshuffles'], result['naturals']], stats
+
+
+def shard_sizes(rounds, shard_rounds=SHARD_ROUNDS):
+    sizes = [shard_rounds] * (rounds // shard_rounds)
+    if rounds % shard_rounds:
+        sizes.append(rounds % shard_rounds)
+    return sizes
+
+
+def simulate_parallel(rounds, policy_name, seed=None, num_decks=1, penetration=0.75,
+                      workers=None, stats=False, rules=None):
+    """
+    Split an N-round simulation into shards and run them on a process pool.
+
+    Shard i is seeded with spawn_seeds(seed, shards)[i], so a run is
+    reproducible bit-for-bit from its seed. Policies are passed by name
+    (see simulation.get_policy) so they can be sent to the workers. Returns the
+    same dictionary as simulation.simulate, which contains the keys of
+    Game21.get_statistics, plus the seed used. With stats=True the shards
+    also fill StreamingStats, merged in shard order into result['stats'].
+    rules is a rules.RuleConfig (sent to the workers as is). With workers=1
+    the shards run one after another in this process.
+    """
+    rules = RuleConfig(num_decks=num_decks) if rules is None else rules
+    if seed is None:
+        seed = new_seed()
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    sizes = shard_sizes(rounds)
+    seeds = spawn_seeds(seed, len(sizes))
+
+    start = time.perf_counter()
+    totals = [0] * 7
+    merged = StreamingStats() if stats else None
+
+    def merge(shard_results):
+        # Merge the partial aggregates in shard order
+        nonlocal totals
+        for parts, shard_stats in shard_results:
+            totals = [total + part for total, part in zip(totals, parts)]
+            if merged is not None:
+                merged.merge(shard_stats)
+
+    shards = [(size, policy_name, shard_seed, num_decks, penetration, stats, rules)
+              for size, shard_seed in zip(sizes, seeds)]
+    if workers == 1:
+        # The same shards in this process, so the counts do not depend on the worker count
+        merge(run_shard(*shard) for shard in shards)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [pool.submit(run_shard, *shard) for shard in shards]
+            merge(job.result() for job in jobs)
+    elapsed = time.perf_counter() - start
+
+    result = summarise(totals[:5], elapsed, totals[5], totals[6], rules.compile().natural_payout)
+    result['seed'] = seed
+    result['workers'] = workers
+    if merged is not None:
+        result['stats'] = merged
+    return result
@@ -0,0 +1,210 @@
+import argparse
+import json
+import time
+
+from game_logic import Game21, new_seed, spawn_seeds, OUTCOME_NAMES
+from rules import RuleConfig
+
+# Codes of the trace kept for each round
+HIT = "H"
+DEALER_HIT = "D"
+ABANDONED = "N"
+
+
+class ReplayMismatch(ValueError):
+    """A replayed round or statistics counter differs from the recording"""
+
+
+class Session:
+    """
+    A recorded session: the game's seed and rules plus one trace string per
+    dealt round.
+
+    The seed fixes the shoe order, so the only other input is what the
+    player did. A trace holds "H" for every player hit and "D" for every
+    dealer card drawn one at a time (the UI's dealer turn), and ends with
+    the outcome digit from decide_winner, or "N" when a new round was
+    started before the result. Standing is implied by the end of the hits.
+    The statistics at the end of the session are kept so a replay can check
+    every counter.
+
+    Pass the session to Game21 as recorder (record_game does both).
+    """
+
+    def __init__(self, seed, num_decks=1, penetration=0.75, rounds=None, statistics=None,
+                 rules=None):
+        self.seed = seed
+        self.num_decks = num_decks
+        # rules.RuleConfig of the game; None for the standard rules
+        self.rules = rules
+        self.penetration = penetration
+        self.rounds = rounds if rounds is not None else []
+        self.statistics = statistics
+        self.current = None
+
+    # RECORDING (called by Game21)
+
+    def start_round(self):
+        self.current = []
+
+    def action(self, code):
+        if self.current is not None:
+            self.current.append(code)
+
+    def end_round(self):
+        if self.current is None:
+            return
+        trace = "".join(self.current)
+        if not trace or not trace[-1].isdigit():
+            trace += ABANDONED
+        self.rounds.append(trace)
+        self.current = None
+
+    def finish(self, game):
+        """Close the round in progress and keep the final statistics."""
+        self.end_round()
+        self.statistics = game.get_statistics()
+
+    # STORAGE: one JSON object per line, so files can be streamed
+
+    def to_json(self):
+        data = {
+            'seed': self.seed,
+            'decks': self.num_decks,
+            'penetration': self.penetration,
+            'rounds': self.rounds,
+            'statistics': self.statistics,
+        }
+        if self.rules is not None:
+            data['rules'] = self.rules._asdict()
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, line):
+        data = json.loads(line)
+        rules = RuleConfig(**data['rules']) if 'rules' in data else None
+        return cls(data['seed'], data['decks'], data['penetration'], data['rounds'],
+                   data.get('statistics'), rules)
+
+
+def record_game(num_decks=1, penetration=0.75, seed=None, rules=None, **kwargs):
+    """Return (game, session) for a new Game21 whose play is recorded."""
+    if seed is None:
+        seed = new_seed()
+    if rules is not None:
+        num_decks = rules.num_decks
+    session = Session(seed, num_decks, penetration, rules=rules)
+    game = Game21(num_decks, penetration, seed=seed, recorder=session, rules=rules, **kwargs)
+    return game, session
+
+
+def replay_game(session):
+    """A fresh, unrecorded Game21 in the state the session started from."""
+    return Game21(session.num_decks, session.penetration, seed=session.seed, rules=session.rules)
+
+
+def replay_round(game, trace):
+    """
+    Replay one round trace on game, from the deal up to the result. Like the
+    UI, call game.new_round() before every round but the first. Returns the
+    outcome code, or None for an abandoned round. Raises ReplayMismatch when
+    the outcome differs from the recording.
+    """
+    game.deal_initial_cards()
+    outcome = None
+    for code in trace:
+        if code == HIT:
+            game.player_hit()
+        elif code == DEALER_HIT:
+            game.dealer_hit()
+        elif code != ABANDONED:
+            if not game.player_hand.is_bust() and not game.settled_at_deal():
+                game.reveal_dealer_card()
+                # Finishes the dealer turn (a no-op when the draws were recorded)
+                game.play_dealer_turn()
+            outcome = game.round_outcome()
+            if outcome != int(code):
+                raise ReplayMismatch(f"recorded {OUTCOME_NAMES[int(code)]}, "
+                                     f"replayed {OUTCOME_NAMES[outcome]}")
+            game.decide_winner()
+    return outcome
+
+
+def replay(session):
+    """
+    Replay a whole session headlessly and return the game. Every outcome and,
+    if the session has them, every statistics counter must match.
+    """
+    game = replay_game(session)
+    for number, trace in enumerate(session.rounds):
+        # The UI only starts a new round (and maybe reshuffles) before a deal,
+        # so a session can end with the shoe past the cut card
+        if number:
+            game.new_round()
+        try:
+            replay_round(game, trace)
+        except ReplayMismatch as error:
+            raise ReplayMismatch(f"round {number}: {error}") from None
+    if session.statistics is not None and game.get_statistics() != session.statistics:
+        raise ReplayMismatch(f"statistics {game.get_statistics()} != recorded {session.statistics}")
+    return game
+
+
+def iter_sessions(path):
+    """Read sessions one line at a time, so files of any size can be replayed."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield Session.from_json(line)
+
+
+def save_session(path, session):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(session.to_json() + "\n")
+
+
+def generate_sessions(path, sessions, rounds, policy, seed=0, num_decks=1, penetration=0.75):
+    """Record sessions played headlessly by a simulation policy, for replay benchmarks."""
+    from simulation import play_game21_round
+
+    with open(path, "w", encoding="utf-8") as f:
+        for session_seed in spawn_seeds(seed, sessions):
+            game, session = record_game(num_decks, penetration, session_seed)
+            for _ in range(rounds):
+                play_game21_round(game, policy)
+            session.finish(game)
+            f.write(session.to_json() + "\n")
+
+
+def main():
+    from simulation import POLICIES
+
+    parser = argparse.ArgumentParser(description="Replay recorded Game of 21 sessions")
+    parser.add_argument("path", help="JSON-lines file of recorded sessions")
+    parser.add_argument("--generate", type=int, metavar="SESSIONS",
+                        help="first record this many headless sessions into path")
+    parser.add_argument("--rounds", type=int, default=1000, help="rounds per generated session")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="stand15")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_sessions(args.path, args.generate, args.rounds, POLICIES[args.policy])
+
+    sessions = rounds = mismatches = 0
+    start = time.perf_counter()
+    for session in iter_sessions(args.path):
+        try:
+            replay(session)
+        except ReplayMismatch as error:
+            mismatches += 1
+            print(f"Session {sessions} (seed {session.seed}): {error}")
+        sessions += 1
+        rounds += len(session.rounds)
+    elapsed = time.perf_counter() - start
+
+    print(f"Replayed {sessions} sessions, {rounds} rounds in {elapsed:.2f}s "
+          f"({rounds / elapsed if elapsed > 0 else 0:,.0f} rounds/sec), {mismatches} mismatches")
+
+
+if __name__ == '__main__':
+    main()
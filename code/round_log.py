@@ -0,0 +1,174 @@
+import argparse
+import os
+import struct
+import time
+
+# File layout: a 16-byte header (magic, version, record size) followed by
+# fixed-width little-endian records, one per round
+MAGIC = b"G21ROUND"
+VERSION = 1
+HEADER = struct.Struct("<8sII")
+
+# Card slots kept per hand. Longer hands (possible only with many decks)
+# keep their first MAX_CARDS cards; the count is always the real one.
+MAX_CARDS = 16
+NO_CARD = 255
+
+# round number, outcome, player total, dealer total, player card count,
+# dealer card count, 3 reserved bytes, then the card slots of each hand
+RECORD = struct.Struct(f"<QBBBBB3x{MAX_CARDS}s{MAX_CARDS}s")
+
+# Records buffered before one batched write to the file
+BATCH_ROUNDS = 1024
+
+
+def record_dtype():
+    """NumPy structured dtype with the same layout as RECORD."""
+    import numpy as np
+    return np.dtype([
+        ('round', '<u8'),
+        ('outcome', 'u1'),
+        ('player_total', 'u1'),
+        ('dealer_total', 'u1'),
+        ('player_count', 'u1'),
+        ('dealer_count', 'u1'),
+        ('reserved', 'u1', 3),
+        ('player_cards', 'u1', MAX_CARDS),
+        ('dealer_cards', 'u1', MAX_CARDS),
+    ])
+
+
+def pack_cards(hand):
+    """Card codes of a hand as MAX_CARDS bytes, padded with NO_CARD."""
+    cards = bytes(hand.cards[:MAX_CARDS])
+    return cards + bytes([NO_CARD]) * (MAX_CARDS - len(cards))
+
+
+def complete_records(path):
+    """Number of whole records in the file; a torn last record is not counted."""
+    size = os.path.getsize(path)
+    return max(size - HEADER.size, 0) // RECORD.size
+
+
+def check_header(header):
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError("not a Game of 21 round log (or written by another version)")
+
+
+class RoundLog:
+    """
+    Append-only log of finished rounds.
+
+    Rounds are packed into fixed-width records and written in batches of
+    BATCH_ROUNDS with a single write, so logging costs a struct.pack per
+    round. Opening an existing log checks its header and cuts off a last
+    record that was only partly written (after a crash or power loss), so
+    new records always start on a record boundary. Call flush() or close()
+    to write out the rounds still buffered.
+    """
+
+    def __init__(self, path, batch_rounds=BATCH_ROUNDS):
+        self.path = path
+        self.batch_rounds = batch_rounds
+        self.buffer = []
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a+b")
+        self.file.seek(0)
+        header = self.file.read(HEADER.size)
+        if not header:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            self.file.flush()
+        elif len(header) < HEADER.size:
+            # Crashed while writing the header of a new log: start it again
+            self.file.truncate(0)
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            self.file.flush()
+        else:
+            try:
+                check_header(header)
+            except ValueError:
+                self.file.close()
+                raise
+            self.recover()
+        self.rounds = complete_records(path)
+
+    def recover(self):
+        """Drop a partly written last record, if there is one."""
+        end = HEADER.size + complete_records(self.path) * RECORD.size
+        if os.path.getsize(self.path) != end:
+            self.file.truncate(end)
+            self.file.flush()
+
+    def append(self, outcome, player_hand, dealer_hand):
+        """Queue one finished round; written out every batch_rounds rounds."""
+        self.buffer.append(RECORD.pack(
+            self.rounds, outcome, player_hand.total(), dealer_hand.total(),
+            len(player_hand), len(dealer_hand), pack_cards(player_hand), pack_cards(dealer_hand)))
+        self.rounds += 1
+        if len(self.buffer) >= self.batch_rounds:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(b"".join(self.buffer))
+            self.buffer.clear()
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_log(path):
+    """
+    Memory-map a round log as a read-only NumPy structured array (see
+    record_dtype). Nothing is copied: pages are read from disk only when
+    used, so the whole log can be analysed however large it is. A torn
+    last record is left out.
+    """
+    import numpy as np
+
+    with open(path, "rb") as f:
+        check_header(f.read(HEADER.size))
+    count = complete_records(path)
+    if count == 0:
+        return np.empty(0, dtype=record_dtype())
+    return np.memmap(path, dtype=record_dtype(), mode="r", offset=HEADER.size, shape=(count,))
+
+
+def main():
+    import numpy as np
+    from game_logic import OUTCOME_NAMES
+
+    parser = argparse.ArgumentParser(description="Summarise a Game of 21 round log")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rounds = read_log(args.path)
+    counts = np.bincount(rounds['outcome'], minlength=len(OUTCOME_NAMES))
+    player_hist = np.bincount(rounds['player_total'])
+    elapsed = time.perf_counter() - start
+
+    total = len(rounds)
+    print(f"Rounds: {total}")
+    for name, count in zip(OUTCOME_NAMES, counts):
+        print(f"  {name:12} {count:>12}  {count / total if total else 0:.4%}")
+    if total:
+        print("Most common final player total:", int(player_hist.argmax()))
+    print(f"Scanned in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+from stats import PAYOUT_SCALE
+
+# Highest hard total a dealer hand can reach (hard 16 + a ten)
+MAX_HARD_TOTAL = 26
+
+
+class RuleConfig(NamedTuple):
+    """
+    Table rules. The defaults are the original Game of 21: one deck, the
+    dealer stands on every 17, a two-card 21 is an ordinary 21 and a dealer
+    total over 21 always busts.
+
+    - hit_soft_17: the dealer hits soft 17 (H17) instead of standing (S17)
+    - natural_payout: when set, a two-card 21 is a natural. A player natural
+      is settled straight after the deal and wins this many bets (1.5 for
+      3:2, in tenths of a bet), or pushes against a dealer natural; a dealer natural beats every
+      other player hand, including a 21 made with more cards
+    - dealer_peek: with naturals, the dealer checks for a natural straight
+      after the deal and the round ends before the player acts
+    - push_on_22: a dealer finishing on exactly 22 pushes with every player
+      hand still standing instead of busting
+    """
+    num_decks: int = 1
+    hit_soft_17: bool = False
+    natural_payout: float = None
+    dealer_peek: bool = False
+    push_on_22: bool = False
+
+    def key(self):
+        """Short name of the rule set, used to key caches on disk."""
+        key = f"decks{self.num_decks}-{'h17' if self.hit_soft_17 else 's17'}"
+        if self.natural_payout is not None:
+            key += f"-bj{self.natural_payout:g}"
+        if self.dealer_peek:
+            key += "-peek"
+        if self.push_on_22:
+            key += "-p22"
+        return key
+
+    def compile(self):
+        return compile_rules(self)
+
+
+STANDARD_RULES = RuleConfig()
+
+
+class CompiledRules(NamedTuple):
+    """
+    A RuleConfig turned into the lookup tables and constants used on the hot
+    paths, so the rules cost no extra branches per card:
+
+    - dealer_limits[soft]: the dealer hits while the total is below this
+    - dealer_hits[hard_total * 2 + has_ace]: 1 when the dealer hits a hand
+      stored as (hard total, Ace flag) like game_logic.Hand
+    - push_total: dealer total that pushes instead of busting (0 = none)
+    """
+    rules: RuleConfig
+    dealer_limits: tuple
+    dealer_hits: bytes
+    naturals: bool
+    natural_payout: float
+    dealer_peek: bool
+    push_total: int
+
+
+@lru_cache(maxsize=None)
+def compile_rules(rules):
+    if rules.num_decks < 1:
+        raise ValueError("a shoe needs at least one deck")
+    if rules.natural_payout is not None:
+        if rules.natural_payout <= 0:
+            raise ValueError("the natural payout must be positive")
+        # Payouts are counted in whole tenths of a bet (stats.PAYOUT_SCALE)
+        units = rules.natural_payout * PAYOUT_SCALE
+        if abs(units - round(units)) > 1e-9:
+            raise ValueError(f"the natural payout must be a multiple of 1/{PAYOUT_SCALE} of a bet")
+    if rules.dealer_peek and rules.natural_payout is None:
+        raise ValueError("the dealer can only peek for naturals when naturals are paid")
+
+    dealer_limits = (17, 18 if rules.hit_soft_17 else 17)
+    dealer_hits = bytearray(2 * (MAX_HARD_TOTAL + 1))
+    for hard_total in range(MAX_HARD_TOTAL + 1):
+        for has_ace in (0, 1):
+            soft = has_ace and hard_total <= 11
+            total = hard_total + 10 if soft else hard_total
+            dealer_hits[hard_total * 2 + has_ace] = total < dealer_limits[soft]
+
+    return CompiledRules(
+        rules,
+        dealer_limits,
+        bytes(dealer_hits),
+        rules.natural_payout is not None,
+        rules.natural_payout if rules.natural_payout is not None else 1.0,
+        rules.dealer_peek,
+        22 if rules.push_on_22 else 0,
+    )
+
+
+def as_rules(rules):
+    """Accept a RuleConfig, a deck count (standard rules) or None (standard rules)."""
+    if rules is None:
+        return STANDARD_RULES
+    if isinstance(rules, int):
+        return RuleConfig(num_decks=rules)
+    return rules
+
+
+def add_rule_arguments(parser):
+    """Command line options for every rule (the deck count is --decks)."""
+    parser.add_argument("--h17", action="store_true", help="dealer hits soft 17")
+    parser.add_argument("--natural-payout", type=float, default=None,
+                        help="pay two-card 21s this many bets (e.g. 1.5); off by default")
+    parser.add_argument("--peek", action="store_true", help="dealer peeks for a natural")
+    parser.add_argument("--push-22", action="store_true", help="dealer 22 pushes instead of busting")
+
+
+def rules_from_args(args):
+    return RuleConfig(args.decks, args.h17, args.natural_payout, args.peek, args.push_22)
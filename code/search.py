@@ -0,0 +1,162 @@
+import argparse
+import time
+from typing import NamedTuple
+
+from cards import CARD_VALUES
+from dealer_odds import composition_of, dealer_distribution
+from game_logic import Game21
+from rules import as_rules
+from strategy import stand_ev
+
+
+class SearchState(NamedTuple):
+    """
+    A node of the search: the unseen cards as a composition tuple plus the
+    player's hand as (hard total, Ace flag). Forking copies 12 small ints,
+    never the shoe, and equal states from different card orders compare
+    equal, which is what the transposition table relies on.
+    """
+    composition: tuple
+    hard_total: int
+    has_ace: bool
+
+    def total(self):
+        return self.hard_total + 10 if self.has_ace and self.hard_total <= 11 else self.hard_total
+
+    def fork_hit(self, index):
+        """The state after the player draws a card of composition index."""
+        counts = list(self.composition)
+        counts[index] -= 1
+        return SearchState(tuple(counts), self.hard_total + index + 1,
+                           self.has_ace or index == 0)
+
+
+def root_state(snapshot):
+    """Search root for a Game21.snapshot, read straight from the shared shoe buffer."""
+    hand_hard = sum(CARD_VALUES[card] for card in snapshot.player)
+    aces = sum(1 for card in snapshot.player if CARD_VALUES[card] == 11)
+    return SearchState(composition_of(snapshot.unseen_cards()), hand_hard - 10 * aces, aces > 0)
+
+
+class Expectimax:
+    """
+    Expectimax over hit/stand for one round: max nodes choose hit or stand,
+    chance nodes draw every unseen card rank with its probability. The
+    dealer's result is the exact distribution from dealer_odds. Values are
+    stored in a transposition table keyed by SearchState, so a state reached
+    by different card orders is searched once. max_hits limits how many more
+    cards the player may take (None = no limit). rules is a rules.RuleConfig.
+    """
+
+    def __init__(self, upcard, rules=None):
+        self.upcard = upcard
+        self.rules = as_rules(rules)
+        self.table = {}
+        self.nodes = 0
+
+    def stand_value(self, state):
+        dealer = dealer_distribution(self.upcard, state.composition, self.rules.hit_soft_17)
+        return stand_ev(state.total(), dealer, self.rules.push_on_22)
+
+    def value(self, state, max_hits=None):
+        """Best expected return from state and whether hitting is best: (ev, hit)."""
+        key = (state, max_hits)
+        known = self.table.get(key)
+        if known is not None:
+            return known
+        self.nodes += 1
+
+        stand = self.stand_value(state)
+        best = (stand, False)
+        if max_hits != 0:
+            hit = self.hit_value(state, None if max_hits is None else max_hits - 1)
+            if hit > stand:
+                best = (hit, True)
+        self.table[key] = best
+        return best
+
+    def hit_value(self, state, max_hits=None):
+        """Expected return of taking one card, then playing on with value()."""
+        remaining = sum(state.composition)
+        if remaining == 0:
+            return -1.0
+        ev = 0.0
+        for index, count in enumerate(state.composition):
+            if not count:
+                continue
+            child = state.fork_hit(index)
+            if child.hard_total > 21:
+                ev -= count / remaining
+            else:
+                ev += count / remaining * self.value(child, max_hits)[0]
+        return ev
+
+    def hits_then_stand(self, state, hits):
+        """Expected return of hitting exactly hits times (unless bust), then standing."""
+        if hits == 0:
+            self.nodes += 1
+            return self.stand_value(state)
+        remaining = sum(state.composition)
+        ev = 0.0
+        for index, count in enumerate(state.composition):
+            if not count:
+                continue
+            child = state.fork_hit(index)
+            if child.hard_total > 21:
+                ev -= count / remaining
+            else:
+                ev += count / remaining * self.hits_then_stand(child, hits - 1)
+        return ev
+
+
+def analyse(game, max_hits=None):
+    """
+    Search the current round of game from a snapshot (the game is not
+    changed). Returns stand, best and what-if EVs plus node counts.
+    """
+    snapshot = game.snapshot()
+    root = root_state(snapshot)
+    search = Expectimax(CARD_VALUES[snapshot.dealer[1]], game.rules)
+
+    start = time.perf_counter()
+    best, hit = search.value(root, max_hits)
+    what_if = {hits: search.hits_then_stand(root, hits) for hits in (0, 1, 2)}
+    elapsed = time.perf_counter() - start
+    return {
+        'best_ev': best,
+        'hit': hit,
+        'what_if': what_if,
+        'nodes': search.nodes,
+        'table_size': len(search.table),
+        'elapsed': elapsed,
+        'nodes_per_sec': search.nodes / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expectimax hit/stand search on dealt rounds")
+    parser.add_argument("--rounds", type=int, default=20, help="rounds to deal and search")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--decks", type=int, default=1)
+    parser.add_argument("--max-hits", type=int, default=None,
+                        help="limit the number of further hits searched")
+    args = parser.parse_args()
+
+    game = Game21(args.decks, seed=args.seed)
+    nodes = 0
+    elapsed = 0.0
+    for _ in range(args.rounds):
+        game.deal_initial_cards()
+        result = analyse(game, args.max_hits)
+        nodes += result['nodes']
+        elapsed += result['elapsed']
+        what_if = " ".join(f"{hits} hits {ev:+.3f}" for hits, ev in result['what_if'].items())
+        print(f"Player {game.player_total():2} vs {CARD_VALUES[game.dealer_hand[1]]:2}: "
+              f"{'Hit ' if result['hit'] else 'Stand'} {result['best_ev']:+.3f} | {what_if} | "
+              f"{result['nodes']} nodes")
+        game.new_round()
+    print(f"{nodes} nodes in {elapsed:.2f}s ({nodes / elapsed if elapsed > 0 else 0:,.0f} nodes/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import json
+import secrets
+import time
+from collections import OrderedDict
+
+from game_logic import Game21, PLAYER_BUST
+from rules import add_rule_arguments, rules_from_args
+
+# Sessions not used for this long are dropped
+IDLE_SECONDS = 300
+# How often the eviction task looks for idle sessions
+EVICT_INTERVAL = 5
+# Upper limit on live sessions; the least recently used one goes first
+MAX_SESSIONS = 100_000
+
+# Per-table round states, same names as the UI's
+PLAYER_TURN = "player_turn"
+RESULT = "result"
+
+DEFAULT_PORT = 2121
+
+
+class ProtocolError(Exception):
+    """A request the server cannot carry out; sent back to the client as an error"""
+
+
+class Table:
+    """One client table: a Game21 and where its round is."""
+
+    __slots__ = ("game", "state", "last_used", "result")
+
+    def __init__(self, seed=None, rules=None):
+        self.game = Game21(seed=seed, rules=rules)
+        self.state = RESULT
+        self.last_used = time.monotonic()
+        self.result = None
+
+    def deal(self):
+        # Like the UI's New Game, this also abandons a round in progress
+        game = self.game
+        game.new_round()
+        game.deal_initial_cards()
+        self.state = PLAYER_TURN
+        self.result = None
+        if game.settled_at_deal():
+            self.finish()
+
+    def hit(self):
+        if self.state != PLAYER_TURN:
+            raise ProtocolError("no round in progress, send deal first")
+        self.game.player_hit()
+        if self.game.player_hand.is_bust():
+            self.finish()
+
+    def stand(self):
+        if self.state != PLAYER_TURN:
+            raise ProtocolError("no round in progress, send deal first")
+        self.game.reveal_dealer_card()
+        self.game.play_dealer_turn()
+        self.finish()
+
+    def finish(self):
+        self.game.reveal_dealer_card()
+        self.result = self.game.decide_winner()
+        self.state = RESULT
+
+    def view(self):
+        """The table as the player sees it; the hole card stays hidden during the player's turn."""
+        game = self.game
+        dealer = list(game.dealer_hand)
+        if not game.dealer_hidden_revealed:
+            dealer[0] = None
+        view = {
+            'state': self.state,
+            'player': list(game.player_hand),
+            'player_total': game.player_total(),
+            'dealer': dealer,
+        }
+        if self.state == RESULT:
+            view['dealer_total'] = game.dealer_total()
+            view['result'] = self.result
+            view['outcome'] = game.round_outcome()
+            view['busted'] = view['outcome'] == PLAYER_BUST
+        return view
+
+
+class TableServer:
+    """
+    Hosts many independent tables over JSON lines.
+
+    Every request is one JSON object per line, {"action": ..., "session": ...,
+    "id": ...}, with action deal, hit, stand or stats. deal without a session
+    opens a new table and its id comes back in "session"; any connection
+    may then play any of its tables, and one connection can play many. The
+    reply echoes "id" so requests can be pipelined. Game21 calls take
+    microseconds, so requests are answered straight from the connection's
+    coroutine. Tables idle for idle_seconds, or the least recently used ones
+    beyond max_sessions, are evicted.
+    """
+
+    def __init__(self, idle_seconds=IDLE_SECONDS, max_sessions=MAX_SESSIONS, rules=None):
+        self.idle_seconds = idle_seconds
+        # Every table is played under the same rules.RuleConfig
+        self.rules = rules
+        self.max_sessions = max_sessions
+        # Least recently used first, so eviction only looks at the front
+        self.tables = OrderedDict()
+        self.actions = 0
+        self.evicted = 0
+
+    # SESSIONS
+
+    def open_table(self, seed=None):
+        session = secrets.token_hex(8)
+        self.tables[session] = Table(seed, self.rules)
+        while len(self.tables) > self.max_sessions:
+            self.tables.popitem(last=False)
+            self.evicted += 1
+        return session
+
+    def table(self, session):
+        table = self.tables.get(session)
+        if table is None:
+            raise ProtocolError("unknown or expired session")
+        self.tables.move_to_end(session)
+        table.last_used = time.monotonic()
+        return table
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        tables = self.tables
+        while tables:
+            session, table = next(iter(tables.items()))
+            if table.last_used >= cutoff:
+                break
+            del tables[session]
+            self.evicted += 1
+
+    async def evict_forever(self):
+        while True:
+            await asyncio.sleep(EVICT_INTERVAL)
+            self.evict_idle()
+
+    # REQUESTS
+
+    def handle(self, request):
+        action = request.get('action')
+        session = request.get('session')
+        if action == 'deal' and session is None:
+            seed = request.get('seed')
+            if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+                raise ProtocolError("seed must be an integer")
+            session = self.open_table(seed)
+        elif session is None:
+            raise ProtocolError("missing session")
+        elif not isinstance(session, str):
+            raise ProtocolError("session must be a string")
+        table = self.table(session)
+
+        if action == 'deal':
+            table.deal()
+        elif action == 'hit':
+            table.hit()
+        elif action == 'stand':
+            table.stand()
+        elif action == 'stats':
+            return {'session': session, 'statistics': table.game.get_statistics()}
+        else:
+            raise ProtocolError(f"unknown action {action!r}")
+        reply = table.view()
+        reply['session'] = session
+        return reply
+
+    def reply_to(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {'ok': False, 'error': "invalid JSON"}
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "a request must be a JSON object"}
+        try:
+            reply = self.handle(request)
+            reply['ok'] = True
+        except ProtocolError as error:
+            reply = {'ok': False, 'error': str(error)}
+        if 'id' in request:
+            reply['id'] = request['id']
+        self.actions += 1
+        return reply
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(json.dumps(self.reply_to(line)).encode() + b"\n")
+                # Only waits when the client is not reading its replies
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None):
+        """Start listening and evicting; returns the asyncio server."""
+        if unix_path:
+            server = await asyncio.start_unix_server(self.serve_connection, unix_path)
+        else:
+            server = await asyncio.start_server(self.serve_connection, host, port)
+        self.evictor = asyncio.create_task(self.evict_forever())
+        return server
+
+
+async def serve(host, port, unix_path, idle_seconds, rules=None):
+    table_server = TableServer(idle_seconds, rules=rules)
+    server = await table_server.start(host, port, unix_path)
+    where = unix_path or f"{host}:{port}"
+    print(f"Serving Game of 21 tables on {where}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game of 21 table server (JSON lines over TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--idle", type=float, default=IDLE_SECONDS,
+                        help="seconds before an unused table is evicted")
+    parser.add_argument("--decks", type=int, default=1, help="number of decks in each shoe")
+    add_rule_arguments(parser)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.idle, rules_from_args(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
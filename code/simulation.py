@@ -0,0 +1,321 @@
+import argparse
+import random
+import time
+
+from cards import CARD_VALUES
+from game_logic import (Game21, make_randbelow, PLAYER_BUST, DEALER_BUST, PLAYER_WIN,
+                        DEALER_WIN, PUSH, OUTCOME_NAMES)
+from rules import RuleConfig, add_rule_arguments, rules_from_args
+
+
+# Card values in the same order as Game21's shoe. Keeping the order
+# identical means the same random numbers deal the same cards as Game21.
+DECK_VALUES = list(CARD_VALUES)
+
+
+# Bets won for each outcome code when no natural is involved
+OUTCOME_PAYOUTS = (-1, 1, 1, -1, 0)
+
+
+# PLAYER POLICIES
+# A policy is any callable policy(player_total, soft, dealer_upcard) -> bool,
+# returning True to hit and False to stand. dealer_upcard is the value of the
+# dealer's visible card (2-11, Ace = 11).
+
+def stand_on(limit):
+    """Return a policy that hits until the player total reaches limit."""
+    def policy(player_total, soft, dealer_upcard):
+        return player_total < limit
+    return policy
+
+
+def always_stand(player_total, soft, dealer_upcard):
+    return False
+
+
+POLICIES = {
+    "stand": always_stand,
+    "stand12": stand_on(12),
+    "stand15": stand_on(15),
+    "dealer": stand_on(17),
+}
+
+# Policies that are looked up from a solved table rather than defined here
+TABLE_POLICIES = ["optimal"]
+
+
+def get_policy(name, rules=1):
+    """
+    Return the policy with the given name, loading solved tables on demand.
+    rules is a rules.RuleConfig or just a deck count.
+    """
+    if name == "optimal":
+        from strategy import load_strategy
+        return load_strategy(rules)
+    return POLICIES[name]
+
+
+# SIMULATION
+
+def simulate(rounds, policy, seed=None, num_decks=1, penetration=0.75, rng=None, stats=None,
+             rules=None):
+    """
+    Play rounds of Game21 headlessly under the given player policy.
+
+    Cards come from a persistent, lazily shuffled shoe that is reshuffled at
+    the cut card, exactly like Game21's Shoe (rng defaults to
+    random.Random(seed)). Each round deals two cards each (player first),
+    lets the policy hit or stand, then plays the dealer to 17 exactly like
+    Game21.play_dealer_turn. Returns a dictionary with outcome counts, the
+    same totals as Game21.get_statistics and the speed reached. If stats (a
+    stats.StreamingStats) is given, every round is also recorded in it.
+
+    rules (a rules.RuleConfig, which then also sets the deck count) are
+    compiled once up front; the dealer's hit rule is a table lookup and the
+    other rules are a single flag test each, so every variant runs at the
+    speed of the standard game.
+    """
+    if rng is None:
+        rng = random.Random(seed)
+    randbelow = make_randbelow(rng)
+    counts = [0, 0, 0, 0, 0]
+
+    rules = RuleConfig(num_decks=num_decks) if rules is None else rules
+    compiled = rules.compile()
+    # The dealer hits while the total is below dealer_limits[soft]
+    dealer_limits = compiled.dealer_limits
+    naturals = compiled.naturals
+    natural_payout = compiled.natural_payout
+    dealer_peek = compiled.dealer_peek
+    push_total = compiled.push_total
+    natural_wins = 0
+
+    shoe = DECK_VALUES * rules.num_decks
+    size = len(shoe)
+    cut_card = min(int(size * penetration), size - 4)
+    position = 0
+    reshuffles = 0
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        if position >= cut_card:
+            position = 0
+            reshuffles += 1
+
+        # Same dealing order as Game21.deal_initial_cards, one lazy
+        # Fisher-Yates step per card like Shoe.draw
+        for i in range(position, position + 4):
+            swap = i + randbelow(size - i)
+            shoe[i], shoe[swap] = shoe[swap], shoe[i]
+        first, second, hidden, upcard = shoe[position:position + 4]
+        position += 4
+        # dealer_hand[0] is the hidden card, so dealer_hand[1] is the upcard
+        dealer_total = hidden + upcard
+        dealer_aces = (hidden == 11) + (upcard == 11)
+        if dealer_total > 21:
+            dealer_total -= 10
+            dealer_aces -= 1
+
+        player_total = first + second
+        player_aces = (first == 11) + (second == 11)
+        if player_total > 21:
+            player_total -= 10
+            player_aces -= 1
+
+        # Naturals: a player natural (or a dealer natural found by peeking)
+        # settles the round before the player acts
+        dealer_natural = False
+        if naturals:
+            dealer_natural = dealer_total == 21
+            if player_total == 21 or (dealer_peek and dealer_natural):
+                if player_total == 21 and not dealer_natural:
+                    outcome = PLAYER_WIN
+                    natural_wins += 1
+                else:
+                    outcome = PUSH if player_total == 21 else DEALER_WIN
+                counts[outcome] += 1
+                if stats is not None:
+                    payout = natural_payout if outcome == PLAYER_WIN else OUTCOME_PAYOUTS[outcome]
+                    stats.record(outcome, player_total, dealer_total, upcard, payout)
+                continue
+
+        # Player turn
+        busted = False
+        while policy(player_total, player_aces > 0, upcard):
+            if position == size:
+                position = 0
+                reshuffles += 1
+            swap = position + randbelow(size - position)
+            card = shoe[swap]
+            shoe[swap] = shoe[position]
+            shoe[position] = card
+            position += 1
+            player_total += card
+            if card == 11:
+                player_aces += 1
+            while player_total > 21 and player_aces:
+                player_total -= 10
+                player_aces -= 1
+            if player_total > 21:
+                busted = True
+                break
+
+        if busted:
+            counts[PLAYER_BUST] += 1
+            if stats is not None:
+                stats.record(PLAYER_BUST, player_total, None, upcard)
+            continue
+
+        # Dealer turn: hit until 17 or more (soft 17 too under H17).
+        # dealer_aces is 0 or 1 here: two Aces counted as 11 would bust.
+        while dealer_total < dealer_limits[dealer_aces]:
+            if position == size:
+                position = 0
+                reshuffles += 1
+            swap = position + randbelow(size - position)
+            card = shoe[swap]
+            shoe[swap] = shoe[position]
+            shoe[position] = card
+            position += 1
+            dealer_total += card
+            if card == 11:
+                dealer_aces += 1
+            while dealer_total > 21 and dealer_aces:
+                dealer_total -= 10
+                dealer_aces -= 1
+
+        if dealer_natural:
+            outcome = DEALER_WIN
+        elif dealer_total > 21:
+            outcome = PUSH if dealer_total == push_total else DEALER_BUST
+        elif player_total > dealer_total:
+            outcome = PLAYER_WIN
+        elif dealer_total > player_total:
+            outcome = DEALER_WIN
+        else:
+            outcome = PUSH
+        counts[outcome] += 1
+        if stats is not None:
+            stats.record(outcome, player_total, dealer_total, upcard, OUTCOME_PAYOUTS[outcome])
+    elapsed = time.perf_counter() - start
+
+    return summarise(counts, elapsed, reshuffles, natural_wins, natural_payout)
+
+
+def summarise(counts, elapsed, reshuffles=0, natural_wins=0, natural_payout=1.0):
+    """
+    Turn raw outcome counts into the result dictionary returned by simulate.
+    natural_wins of the player wins were naturals paid natural_payout.
+    """
+    total_games = sum(counts)
+    player_wins = counts[DEALER_BUST] + counts[PLAYER_WIN]
+    dealer_wins = counts[PLAYER_BUST] + counts[DEALER_WIN]
+    returned = player_wins - dealer_wins + natural_wins * (natural_payout - 1)
+    return {
+        'outcomes': dict(zip(OUTCOME_NAMES, counts)),
+        'player_wins': player_wins,
+        'dealer_wins': dealer_wins,
+        'pushes': counts[PUSH],
+        'total_games': total_games,
+        'naturals': natural_wins,
+        'ev': returned / total_games if total_games else 0.0,
+        'reshuffles': reshuffles,
+        'elapsed': elapsed,
+        'rounds_per_sec': total_games / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def play_game21_round(game, policy):
+    """
+    Play one round through the regular Game21 methods, in the same order the
+    UI calls them, and return the outcome code. As in the UI, new_round runs
+    before every deal but the first, not after the result.
+    """
+    if len(game.player_hand):
+        game.new_round()
+    game.deal_initial_cards()
+    upcard = game.card_value(game.dealer_hand[1])
+    if game.settled_at_deal():
+        outcome = game.round_outcome()
+        game.decide_winner()
+        return outcome
+
+    while True:
+        total = game.player_total()
+        soft = game.player_hand.is_soft()
+        if total > 21 or not policy(total, soft, upcard):
+            break
+        game.player_hit()
+
+    if not game.player_hand.is_bust():
+        game.reveal_dealer_card()
+        game.play_dealer_turn()
+
+    outcome = game.round_outcome()
+    game.decide_winner()
+    return outcome
+
+
+def compare_with_game21(rounds, policy, seed=0, num_decks=1, penetration=0.75, rules=None):
+    """
+    Cross-check the fast engine against Game21 itself.
+
+    Both are driven from the same seed, so they see the same cards and must
+    produce identical outcome counts. Returns (engine_counts, game21_counts).
+    """
+    engine = simulate(rounds, policy, seed, num_decks, penetration, rules=rules)['outcomes']
+
+    game = Game21(num_decks, penetration, seed=seed, rules=rules)
+    counts = [0, 0, 0, 0, 0]
+    for _ in range(rounds):
+        counts[play_game21_round(game, policy)] += 1
+
+    return engine, dict(zip(OUTCOME_NAMES, counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Game of 21 simulation")
+    parser.add_argument("--rounds", type=int, default=1_000_000)
+    parser.add_argument("--policy", choices=sorted(POLICIES) + TABLE_POLICIES, default="dealer")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--decks", type=int, default=1, help="number of decks in the shoe")
+    parser.add_argument("--penetration", type=float, default=0.75,
+                        help="fraction of the shoe dealt before the cut card")
+    add_rule_arguments(parser)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (0 = one per CPU core)")
+    parser.add_argument("--stats", action="store_true",
+                        help="also report confidence intervals, bust rates by upcard and streaks")
+    parser.add_argument("--check", action="store_true",
+                        help="also replay the rounds through Game21 and compare")
+    args = parser.parse_args()
+
+    rules = rules_from_args(args)
+    policy = get_policy(args.policy, rules)
+    # Always sharded, so a seed gives the same counts with any number of workers
+    from parallel import simulate_parallel
+    result = simulate_parallel(args.rounds, args.policy, args.seed, args.decks,
+                               args.penetration, args.workers or None, stats=args.stats,
+                               rules=rules)
+    stats = result.get('stats')
+    print(f"Workers: {result['workers']} | Seed: {result['seed']}")
+
+    print(f"Rounds: {result['total_games']}")
+    for name, count in result['outcomes'].items():
+        print(f"  {name:12} {count:>10}  {count / result['total_games']:.4%}")
+    print(f"Player Wins: {result['player_wins']} | Dealer Wins: {result['dealer_wins']} | "
+          f"Ties: {result['pushes']} | Reshuffles: {result['reshuffles']}")
+    print(f"Rules: {rules.key()} | EV: {result['ev']:+.4f} bets/round")
+    print(f"{result['rounds_per_sec']:,.0f} rounds/sec")
+    if stats is not None:
+        print(stats.summary())
+
+    if args.check:
+        engine, oracle = compare_with_game21(args.rounds, policy,
+                                             0 if args.seed is None else args.seed,
+                                             args.decks, args.penetration, rules)
+        print("Game21 cross-check:", "identical" if engine == oracle else f"MISMATCH {oracle}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+import math
+
+
+# Payouts are stored in tenths of a bet, so every payout (1, 1.5, 1.2, ...)
+# is an integer and sums stay exact
+PAYOUT_SCALE = 10
+
+# Histogram size: the highest possible final total is 30 (hard 20 + a ten)
+MAX_TOTAL = 31
+
+# Upcards 2-11 (Ace = 11) are stored at index upcard - 2
+UPCARDS = 10
+
+WIN = 1
+LOSS = -1
+NEUTRAL = 0
+
+# Result for the player of each game_logic outcome code (player bust,
+# dealer bust, player win, dealer win, push). game_logic imports this
+# module, so the codes are not imported from there.
+OUTCOME_RESULT = (LOSS, WIN, WIN, LOSS, NEUTRAL)
+
+
+def wilson_interval(successes, n, z=1.96):
+    """Wilson score interval of a rate; stays inside [0, 1] for small n."""
+    if not n:
+        return (0.0, 1.0)
+    p = successes / n
+    centre = p + z * z / (2 * n)
+    spread = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+    scale = 1 + z * z / n
+    return ((centre - spread) / scale, (centre + spread) / scale)
+
+
+class StreamingStats:
+    """
+    Round statistics updated in O(1) per round with constant memory.
+
+    Keeps outcome counts, the sum and sum of squares of the payout per round
+    (in integer tenths of a bet, which gives the same mean and variance as a
+    Welford update but without rounding, so merges are exact), histograms of
+    final player and dealer totals, player and dealer bust counts per dealer
+    upcard, and win/loss streaks. Two StreamingStats can be merged; for the
+    streaks the other one is taken to follow this one in time.
+    """
+
+    def __init__(self):
+        self.rounds = 0
+        self.outcomes = [0] * len(OUTCOME_RESULT)
+        self.payout_sum = 0
+        self.payout_squares = 0
+        self.player_totals = [0] * MAX_TOTAL
+        self.dealer_totals = [0] * MAX_TOTAL
+        self.upcard_rounds = [0] * UPCARDS
+        self.upcard_dealer_plays = [0] * UPCARDS
+        self.upcard_dealer_busts = [0] * UPCARDS
+        self.upcard_player_busts = [0] * UPCARDS
+        # Streaks are runs of the same result (win, loss or push)
+        self.longest_win_streak = 0
+        self.longest_loss_streak = 0
+        self.first_run = (NEUTRAL, 0)
+        self.current_run = (NEUTRAL, 0)
+
+    def record(self, outcome, player_total, dealer_total, upcard, payout=None):
+        """
+        Add one round. dealer_total is None when the dealer did not play
+        (the player busted). payout defaults to +1 / 0 / -1 bet.
+        """
+        result = OUTCOME_RESULT[outcome]
+        units = result * PAYOUT_SCALE if payout is None else round(payout * PAYOUT_SCALE)
+
+        self.rounds += 1
+        self.outcomes[outcome] += 1
+        self.payout_sum += units
+        self.payout_squares += units * units
+
+        self.player_totals[min(player_total, MAX_TOTAL - 1)] += 1
+        upcard_index = upcard - 2
+        self.upcard_rounds[upcard_index] += 1
+        if dealer_total is None:
+            self.upcard_player_busts[upcard_index] += 1
+        else:
+            self.dealer_totals[min(dealer_total, MAX_TOTAL - 1)] += 1
+            self.upcard_dealer_plays[upcard_index] += 1
+            if dealer_total > 21:
+                self.upcard_dealer_busts[upcard_index] += 1
+
+        kind, length = self.current_run
+        run = (result, length + 1) if kind == result and length else (result, 1)
+        self.current_run = run
+        if self.first_run[1] == self.rounds - 1 and (self.rounds == 1 or self.first_run[0] == result):
+            # Still inside the very first run
+            self.first_run = run
+        self.note_streak(run)
+
+    def note_streak(self, run):
+        kind, length = run
+        if kind == WIN and length > self.longest_win_streak:
+            self.longest_win_streak = length
+        elif kind == LOSS and length > self.longest_loss_streak:
+            self.longest_loss_streak = length
+
+    def merge(self, other):
+        """Add the rounds of other (played after these) into this object."""
+        joined = None
+        if self.rounds and other.rounds and self.current_run[0] == other.first_run[0]:
+            joined = (self.current_run[0], self.current_run[1] + other.first_run[1])
+
+        first_run = self.first_run if self.rounds else other.first_run
+        if joined and self.first_run[1] == self.rounds:
+            first_run = joined
+        current_run = other.current_run if other.rounds else self.current_run
+        if joined and other.first_run[1] == other.rounds:
+            current_run = joined
+
+        self.rounds += other.rounds
+        self.outcomes = [a + b for a, b in zip(self.outcomes, other.outcomes)]
+        self.payout_sum += other.payout_sum
+        self.payout_squares += other.payout_squares
+        for name in ("player_totals", "dealer_totals", "upcard_rounds", "upcard_dealer_plays",
+                     "upcard_dealer_busts", "upcard_player_busts"):
+            setattr(self, name, [a + b for a, b in zip(getattr(self, name), getattr(other, name))])
+
+        self.longest_win_streak = max(self.longest_win_streak, other.longest_win_streak)
+        self.longest_loss_streak = max(self.longest_loss_streak, other.longest_loss_streak)
+        if joined:
+            self.note_streak(joined)
+        self.first_run = first_run
+        self.current_run = current_run
+        return self
+
+    # DERIVED VALUES
+
+    def rate(self, outcome):
+        return self.outcomes[outcome] / self.rounds if self.rounds else 0.0
+
+    def rate_interval(self, outcome, z=1.96):
+        """Wilson score confidence interval of an outcome's rate."""
+        return wilson_interval(self.outcomes[outcome], self.rounds, z)
+
+    def result_count(self, result):
+        """Rounds the player won (WIN), lost (LOSS) or pushed (NEUTRAL)."""
+        return sum(count for count, kind in zip(self.outcomes, OUTCOME_RESULT) if kind == result)
+
+    def win_rate(self):
+        return self.result_count(WIN) / self.rounds if self.rounds else 0.0
+
+    def win_rate_interval(self, z=1.96):
+        """Wilson score confidence interval of the rate of rounds the player wins."""
+        return wilson_interval(self.result_count(WIN), self.rounds, z)
+
+    def mean_payout(self):
+        """Average return per round, in bets (the player's edge when negative)."""
+        return self.payout_sum / PAYOUT_SCALE / self.rounds if self.rounds else 0.0
+
+    def payout_variance(self):
+        n = self.rounds
+        if n < 2:
+            return 0.0
+        # Exact integer arithmetic until the final division
+        m2 = self.payout_squares * n - self.payout_sum * self.payout_sum
+        return m2 / (n * (n - 1)) / (PAYOUT_SCALE * PAYOUT_SCALE)
+
+    def payout_interval(self, z=1.96):
+        """Normal confidence interval of the mean return per round."""
+        mean = self.mean_payout()
+        if self.rounds < 2:
+            return (mean, mean)
+        half = z * math.sqrt(self.payout_variance() / self.rounds)
+        return (mean - half, mean + half)
+
+    def dealer_bust_rate(self, upcard):
+        plays = self.upcard_dealer_plays[upcard - 2]
+        return self.upcard_dealer_busts[upcard - 2] / plays if plays else 0.0
+
+    def player_bust_rate(self, upcard):
+        rounds = self.upcard_rounds[upcard - 2]
+        return self.upcard_player_busts[upcard - 2] / rounds if rounds else 0.0
+
+    def summary(self):
+        """Multi-line text report."""
+        from game_logic import OUTCOME_NAMES
+
+        lines = [f"Rounds: {self.rounds}"]
+        for outcome, name in enumerate(OUTCOME_NAMES):
+            low, high = self.rate_interval(outcome)
+            lines.append(f"  {name:12} {self.rate(outcome):7.2%}  (95% CI {low:.2%} - {high:.2%})")
+        low, high = self.payout_interval()
+        lines.append(f"Mean return: {self.mean_payout():+.4f} bets/round (95% CI {low:+.4f} to {high:+.4f})")
+        lines.append("Dealer bust rate by upcard: " + "  ".join(
+            f"{upcard if upcard < 11 else 'A'}:{self.dealer_bust_rate(upcard):.1%}"
+            for upcard in range(2, 12)))
+        lines.append(f"Longest win streak: {self.longest_win_streak} | "
+                     f"Longest loss streak: {self.longest_loss_streak}")
+        return "\n".join(lines)
@@ -0,0 +1,192 @@
+import argparse
+import os
+import time
+
+from dealer_odds import (dealer_distribution, remove_card, shoe_composition, DEALER_22,
+                         DEALER_OUTCOMES)
+from rules import add_rule_arguments, as_rules, rules_from_args
+
+# Decision tables are cached here, next to the code rather than in the CWD
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+# Table layout: one byte (1 = hit, 0 = stand) per (soft, total, upcard),
+# with totals 0-21 and upcards 2-11 (Ace = 11)
+TOTALS = 22
+UPCARDS = 10
+TABLE_SIZE = 2 * TOTALS * UPCARDS
+
+
+def rules_key(rules):
+    """Name of a rule configuration (a RuleConfig or a deck count), used to key the on-disk cache."""
+    return as_rules(rules).key()
+
+
+def table_index(total, soft, upcard):
+    return (soft * TOTALS + total) * UPCARDS + upcard - 2
+
+
+class StrategyTable:
+    """
+    Precomputed hit/stand decisions with O(1) lookup.
+
+    A StrategyTable is itself a policy: table(player_total, soft, upcard)
+    returns True to hit, so it can be passed straight to simulation.simulate.
+    """
+
+    def __init__(self, decisions, key):
+        self.decisions = bytes(decisions)
+        self.key = key
+
+    def should_hit(self, player_total, soft, dealer_upcard):
+        if player_total > 21:
+            return False
+        return self.decisions[(soft * TOTALS + player_total) * UPCARDS + dealer_upcard - 2] == 1
+
+    __call__ = should_hit
+
+    def numpy_policy(self):
+        """Vectorised version of the table for batch.Game21Batch."""
+        import numpy as np
+        decisions = np.frombuffer(self.decisions, dtype=np.uint8).astype(bool)
+
+        def policy(player_totals, soft, dealer_upcards):
+            index = (soft * TOTALS + np.minimum(player_totals, 21)) * UPCARDS + dealer_upcards - 2
+            return decisions[index] & (player_totals <= 21)
+        return policy
+
+
+# SOLVER
+
+def stand_ev(total, dealer, push_on_22=False):
+    """Expected return of standing on total against a dealer outcome distribution."""
+    ev = dealer["bust"] - dealer[DEALER_22] if push_on_22 else dealer["bust"]
+    for outcome in DEALER_OUTCOMES[:5]:
+        dealer_total = int(outcome)
+        if total > dealer_total:
+            ev += dealer[outcome]
+        elif total < dealer_total:
+            ev -= dealer[outcome]
+    return ev
+
+
+def solve_upcard(upcard, composition, rules=None):
+    """
+    Best decisions and expected values against one dealer upcard.
+
+    The dealer outcome is exact for the composition left after the upcard;
+    player draws use the same composition without further removal.
+    Naturals are not modelled: they are settled before any decision, and
+    the dealer's 21s are treated alike. Returns {(total, soft): (hit, ev)}.
+    """
+    rules = as_rules(rules)
+    dealer = dealer_distribution(upcard, composition, rules.hit_soft_17)
+    remaining = sum(composition)
+    # Probability of drawing each card value 1-10 (Ace = 1)
+    draws = [(index + 1, count / remaining) for index, count in enumerate(composition) if count]
+
+    best = {}
+
+    def solve_state(total, soft):
+        hard = total - 10 if soft else total
+        hit = 0.0
+        for value, probability in draws:
+            new_hard = hard + value
+            if new_hard > 21:
+                hit -= probability
+            elif (soft or value == 1) and new_hard <= 11:
+                hit += probability * best[(new_hard + 10, True)][1]
+            else:
+                hit += probability * best[(new_hard, False)][1]
+        stand = stand_ev(total, dealer, rules.push_on_22)
+        best[(total, soft)] = (hit > stand, max(hit, stand))
+
+    # Every hit leads to a state solved earlier: hard 11-21 only move up,
+    # soft hands move up or become hard 12+, hard 4-10 can become soft
+    for total in range(21, 10, -1):
+        solve_state(total, False)
+    for total in range(21, 11, -1):
+        solve_state(total, True)
+    for total in range(10, 3, -1):
+        solve_state(total, False)
+    return best
+
+
+def solve(rules=1):
+    """Solve every (total, soft, upcard) state under rules (a RuleConfig or a deck count)."""
+    rules = as_rules(rules)
+    full = shoe_composition(rules.num_decks)
+    decisions = bytearray(TABLE_SIZE)
+    for upcard in range(2, 12):
+        # Composition index of the upcard: Ace = 0, otherwise value - 1
+        composition = remove_card(full, 0 if upcard == 11 else upcard - 1)
+        for (total, soft), (hit, ev) in solve_upcard(upcard, composition, rules).items():
+            decisions[table_index(total, soft, upcard)] = hit
+    return StrategyTable(decisions, rules.key())
+
+
+# ON-DISK CACHE
+
+def cache_path(key):
+    return os.path.join(CACHE_DIR, f"strategy-{key}.bin")
+
+
+def load_strategy(rules=1):
+    """
+    Return the strategy table for rules (a RuleConfig or a deck count),
+    loading it from the cache or solving and caching it the first time.
+    """
+    rules = as_rules(rules)
+    key = rules.key()
+    path = cache_path(key)
+    try:
+        with open(path, "rb") as f:
+            decisions = f.read()
+        if len(decisions) == TABLE_SIZE:
+            return StrategyTable(decisions, key)
+    except FileNotFoundError:
+        pass
+
+    table = solve(rules)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(table.decisions)
+    return table
+
+
+def chart(table):
+    """Text chart of the table, H = hit, S = stand."""
+    lines = ["      " + " ".join(f"{up if up < 11 else 'A':>2}" for up in range(2, 12))]
+    for soft, totals in ((False, range(4, 22)), (True, range(12, 22))):
+        for total in totals:
+            row = " ".join(" H" if table(total, soft, up) else " S" for up in range(2, 12))
+            lines.append(f"{'soft' if soft else 'hard'} {total:>2} {row}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimal hit/stand table for Game of 21")
+    parser.add_argument("--decks", type=int, default=1, help="number of decks in the shoe")
+    add_rule_arguments(parser)
+    args = parser.parse_args()
+    rules = rules_from_args(args)
+
+    start = time.perf_counter()
+    table = solve(rules)
+    print(f"Solve time: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    load_strategy(rules)
+    start = time.perf_counter()
+    table = load_strategy(rules)
+    print(f"Cache load time: {(time.perf_counter() - start) * 1000:.3f} ms ({cache_path(table.key)})")
+
+    lookups = 1_000_000
+    start = time.perf_counter()
+    for _ in range(lookups):
+        table(16, False, 10)
+    print(f"Lookup latency: {(time.perf_counter() - start) / lookups * 1e9:.0f} ns")
+
+    print(chart(table))
+
+
+if __name__ == '__main__':
+    main()
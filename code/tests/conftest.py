@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules live next to each other and import each other by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Window tests run without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
@@ -0,0 +1,29 @@
+import pytest
+
+from dealer_odds import DEALER_22, DEALER_OUTCOMES, FULL_DECK, dealer_distribution, remove_card
+from strategy import stand_ev
+
+
+@pytest.mark.parametrize("upcard", range(2, 12))
+@pytest.mark.parametrize("hit_soft_17", [False, True])
+def test_bust_is_every_total_over_21(upcard, hit_soft_17):
+    composition = remove_card(FULL_DECK, 0 if upcard == 11 else upcard - 1)
+    dealer = dealer_distribution(upcard, composition, hit_soft_17)
+    assert sum(dealer[outcome] for outcome in DEALER_OUTCOMES) == pytest.approx(1.0)
+    assert 0.0 < dealer[DEALER_22] < dealer["bust"]
+
+
+def test_push_on_22_only_moves_22_from_wins_to_pushes():
+    composition = remove_card(FULL_DECK, 5)
+    dealer = dealer_distribution(6, composition)
+    for total in range(12, 22):
+        assert stand_ev(total, dealer) - stand_ev(total, dealer, push_on_22=True) == \
+            pytest.approx(dealer[DEALER_22])
+
+
+def test_cached_distribution_is_read_only():
+    composition = remove_card(FULL_DECK, 5)
+    dealer = dealer_distribution(6, composition)
+    with pytest.raises(TypeError):
+        dealer["bust"] = 0.0
+    assert dealer_distribution(6, composition)["bust"] > 0.0
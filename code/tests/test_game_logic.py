@@ -0,0 +1,62 @@
+from collections import Counter
+
+import pytest
+
+from game_logic import Game21
+
+
+def unseen(game):
+    return Counter(game.snapshot().unseen_cards())
+
+
+def test_restore_rewinds_the_round():
+    game = Game21(seed=7)
+    game.deal_initial_cards()
+    snapshot = game.snapshot()
+    before = unseen(game)
+
+    for _ in range(3):
+        game.player_hit()
+    game.reveal_dealer_card()
+    game.dealer_hit()
+
+    game.restore(snapshot)
+    assert tuple(game.player_hand.cards) == snapshot.player
+    assert tuple(game.dealer_hand.cards) == snapshot.dealer
+    assert not game.dealer_hidden_revealed
+    assert game.shoe.position == snapshot.position
+    assert unseen(game) == before
+
+    # The same snapshot can be restored again after another line of play
+    game.player_hit()
+    game.restore(snapshot)
+    assert unseen(game) == before
+
+
+def test_restore_after_a_reshuffle_is_refused():
+    game = Game21(seed=7)
+    game.deal_initial_cards()
+    snapshot = game.snapshot()
+    game.shoe.reshuffle()
+    with pytest.raises(ValueError):
+        game.restore(snapshot)
+
+
+def test_restore_after_a_reshuffle_and_reset_statistics_is_refused():
+    game = Game21(seed=7)
+    game.deal_initial_cards()
+    snapshot = game.snapshot()
+    game.shoe.reshuffle()
+    game.reset_statistics()
+    assert game.shoe.reshuffles == snapshot.generation
+    with pytest.raises(ValueError):
+        game.restore(snapshot)
+
+
+def test_restore_from_another_game_is_refused():
+    game = Game21(seed=7)
+    other = Game21(seed=7)
+    other.deal_initial_cards()
+    game.deal_initial_cards()
+    with pytest.raises(ValueError):
+        game.restore(other.snapshot())
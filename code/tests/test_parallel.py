@@ -0,0 +1,12 @@
+from parallel import SHARD_ROUNDS, simulate_parallel
+
+
+def test_worker_count_does_not_change_the_result():
+    # Two shards: one full, one partial
+    rounds = SHARD_ROUNDS + 1000
+    runs = [simulate_parallel(rounds, "stand15", seed=5, workers=workers, stats=True)
+            for workers in (1, 2)]
+    for key in ('outcomes', 'reshuffles', 'naturals', 'ev'):
+        assert runs[0][key] == runs[1][key]
+    assert runs[0]['stats'].summary() == runs[1]['stats'].summary()
+    assert runs[0]['total_games'] == rounds
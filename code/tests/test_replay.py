@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from replay import Session, generate_sessions, iter_sessions, record_game, replay
+from simulation import POLICIES
+
+
+def play_like_the_ui(game, rounds, rng):
+    """Play rounds in the UI's order: new_round before every deal but the first."""
+    for number in range(rounds):
+        if number:
+            game.new_round()
+        game.deal_initial_cards()
+        if game.settled_at_deal():
+            game.decide_winner()
+            continue
+        while game.player_total() < 21 and rng.random() < 0.4:
+            game.player_hit()
+        if not game.player_hand.is_bust():
+            game.reveal_dealer_card()
+            while game.dealer_should_hit():
+                game.dealer_hit()
+        game.decide_winner()
+
+
+def test_sessions_recorded_in_ui_order_replay():
+    ended_past_cut_card = 0
+    for seed in range(60):
+        rng = random.Random(seed)
+        game, session = record_game(seed=seed)
+        play_like_the_ui(game, rng.randint(1, 30), rng)
+        ended_past_cut_card += game.shoe.needs_reshuffle()
+        session.finish(game)
+
+        replayed = replay(Session.from_json(session.to_json()))
+        assert replayed.get_statistics() == session.statistics
+    # The regression only shows when the last round ends past the cut card
+    assert ended_past_cut_card
+
+
+def test_generated_sessions_replay(tmp_path):
+    path = tmp_path / "sessions.jsonl"
+    generate_sessions(path, 5, 50, POLICIES['stand15'])
+    sessions = list(iter_sessions(path))
+    assert len(sessions) == 5
+    for session in sessions:
+        assert len(session.rounds) == 50
+        replay(session)
+
+
+def test_window_session_replays(tmp_path):
+    pytest.importorskip("PyQt6")
+    from PyQt6.QtWidgets import QApplication
+    import main
+
+    app = QApplication.instance() or QApplication([])
+    path = tmp_path / "ui.jsonl"
+    rng = random.Random(1)
+    window = main.MainWindow(welcome=False, record_path=str(path))
+    # Stop when the last round has ended past the cut card
+    for _ in range(200):
+        while window.round_state.state == main.PLAYER_TURN and rng.random() < 0.4:
+            window.on_hit()
+        window.on_stand()
+        window.dealer_timer.stop()
+        while window.round_state.state == main.DEALER_TURN:
+            window.dealer_step()
+        if window.game.shoe.needs_reshuffle():
+            break
+        window.on_new_round()
+    assert window.game.shoe.needs_reshuffle()
+    window.close()
+    app.processEvents()
+
+    session = next(iter_sessions(path))
+    assert replay(session).get_statistics() == session.statistics
+
+
+def test_replay_detects_a_changed_outcome():
+    game, session = record_game(seed=3)
+    play_like_the_ui(game, 5, random.Random(3))
+    session.finish(game)
+    trace = session.rounds[0]
+    outcome = int(trace[-1])
+    session.rounds[0] = trace[:-1] + str((outcome + 1) % 5)
+    with pytest.raises(ValueError):
+        replay(session)
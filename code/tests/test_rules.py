@@ -0,0 +1,25 @@
+import pytest
+
+from rules import RuleConfig
+from simulation import POLICIES, simulate
+from stats import StreamingStats
+
+
+@pytest.mark.parametrize("rules", [
+    RuleConfig(num_decks=0),
+    RuleConfig(natural_payout=0),
+    RuleConfig(natural_payout=1.25),
+    RuleConfig(dealer_peek=True),
+])
+def test_invalid_rules_are_refused(rules):
+    with pytest.raises(ValueError):
+        rules.compile()
+
+
+@pytest.mark.parametrize("payout", [1, 1.1, 1.2, 1.5, 2])
+def test_ev_and_stats_agree_on_natural_payouts(payout):
+    rules = RuleConfig(natural_payout=payout)
+    stats = StreamingStats()
+    result = simulate(20_000, POLICIES['stand15'], seed=2, stats=stats, rules=rules)
+    assert result['naturals']
+    assert stats.mean_payout() == pytest.approx(result['ev'])
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+from server import TableServer
+
+
+@pytest.fixture
+def server():
+    return TableServer()
+
+
+def reply(server, request):
+    line = request if isinstance(request, str) else json.dumps(request)
+    return server.reply_to(line.encode())
+
+
+@pytest.mark.parametrize("line", ["not json", "[1]", "1", '"deal"', "null"])
+def test_non_object_lines_get_an_error(server, line):
+    answer = reply(server, line)
+    assert answer['ok'] is False
+    assert answer['error']
+
+
+@pytest.mark.parametrize("request_", [
+    {'action': 'deal', 'session': [1]},
+    {'action': 'hit', 'session': {}},
+    {'action': 'stand', 'session': 5},
+    {'action': 'deal', 'seed': {}},
+    {'action': 'deal', 'seed': "7"},
+    {'action': 'deal', 'seed': 1.5},
+    {'action': 'deal', 'seed': True},
+    {'action': 'hit'},
+    {'action': 'fold', 'session': "nope"},
+])
+def test_malformed_requests_get_an_error(server, request_):
+    answer = reply(server, dict(request_, id=9))
+    assert answer['ok'] is False
+    assert answer['id'] == 9
+
+
+def test_round_over_the_protocol(server):
+    dealt = reply(server, {'action': 'deal', 'seed': 4, 'id': 1})
+    assert dealt['ok'] and dealt['id'] == 1
+    session = dealt['session']
+    if dealt['state'] == 'player_turn':
+        assert dealt['dealer'][0] is None
+        stood = reply(server, {'action': 'stand', 'session': session})
+        assert stood['state'] == 'result'
+    again = reply(server, {'action': 'stand', 'session': session})
+    assert again['ok'] is False
+    stats = reply(server, {'action': 'stats', 'session': session})
+    assert stats['statistics']['total_games'] == 1
+
+
+def test_connection_survives_malformed_lines():
+    async def exchange():
+        table_server = TableServer()
+        server = await table_server.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        replies = []
+        for line in ("[1]", '{"action":"deal","session":[1]}', '{"action":"deal","seed":{}}',
+                     '{"action":"deal","id":4}'):
+            writer.write(line.encode() + b"\n")
+            await writer.drain()
+            replies.append(json.loads(await asyncio.wait_for(reader.readline(), 5)))
+        writer.close()
+        table_server.evictor.cancel()
+        server.close()
+        await server.wait_closed()
+        return replies
+
+    replies = asyncio.run(exchange())
+    assert [answer['ok'] for answer in replies] == [False, False, False, True]
+    assert replies[-1]['id'] == 4
@@ -0,0 +1,17 @@
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from main import DEFAULT_CARD_STYLE, THEME_FILES, ThemeManager, parse_card_style
+
+
+def test_every_theme_sets_its_card_colors():
+    themes = ThemeManager()
+    styles = {theme: themes.card_style(theme) for theme in THEME_FILES}
+    assert len(set(styles.values())) == len(styles)
+
+
+def test_card_style_follows_the_theme_file():
+    css = "#cardLabel {\n    color: #111;\n    background-color: #222;\n    border: 4px solid #333;\n}"
+    assert parse_card_style(css) == ("#111", "#222", "#333", 4, DEFAULT_CARD_STYLE[4])
+    assert parse_card_style("QLabel { color: red; }") == DEFAULT_CARD_STYLE
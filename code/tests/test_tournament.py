@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from rules import RuleConfig
+from simulation import POLICIES
+from tournament import generate_shoes, play_shoes
+
+
+def shoes(*rows):
+    """Shoe rows from their first cards (player, player, hidden, upcard, hits...)."""
+    return np.array([list(row) + [2] * (52 - len(row)) for row in rows], dtype=np.uint8)
+
+
+NATURAL = (11, 10, 9, 8)
+DEALER_22 = (10, 7, 10, 2, 10)
+# The player hits 16 to 21; only a natural beats it
+DEALER_NATURAL = (10, 6, 11, 10, 5)
+
+
+@pytest.mark.parametrize("rules, expected", [
+    (RuleConfig(), [10, 10, 0]),
+    (RuleConfig(natural_payout=1.5), [15, 10, -10]),
+    (RuleConfig(natural_payout=1.5, dealer_peek=True, push_on_22=True), [15, 0, -10]),
+    (RuleConfig(hit_soft_17=True, push_on_22=True), [10, 0, 0]),
+])
+def test_rules_change_the_payouts(rules, expected):
+    payouts = play_shoes(shoes(NATURAL, DEALER_22, DEALER_NATURAL), POLICIES['dealer'], rules)
+    assert payouts.tolist() == expected
+
+
+def test_every_policy_sees_the_same_shoes():
+    first = generate_shoes(100, seed=5)
+    assert (first == generate_shoes(100, seed=5)).all()
+    assert (np.sort(first, axis=1) == np.sort(first[0])).all()
@@ -0,0 +1,249 @@
+import argparse
+import math
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from cards import CARD_VALUES, ORDERED_DECK
+from rules import add_rule_arguments, as_rules, rules_from_args
+from simulation import POLICIES, TABLE_POLICIES, get_policy
+from stats import PAYOUT_SCALE
+
+# Rounds handed to a worker at a time
+SHARD_ROUNDS = 100_000
+
+
+# SHOES
+
+def generate_shoes(rounds, num_decks=1, seed=None, out=None):
+    """
+    One independently shuffled shoe per round, as a (rounds, cards) array of
+    card values (2-11, Ace = 11) in dealing order. Every policy plays round i
+    from row i, so the only difference between policies is their decisions.
+    """
+    row = np.frombuffer(bytes(CARD_VALUES[card] for card in ORDERED_DECK * num_decks),
+                        dtype=np.uint8)
+    if out is None:
+        out = np.empty((rounds, row.size), dtype=np.uint8)
+    out[:] = row
+    np.random.default_rng(seed).permuted(out, axis=1, out=out)
+    return out
+
+
+# PLAYING FIXED SHOES
+
+def play_shoes(shoes, policy, rules=None):
+    """
+    Play one round per shoe row under Game21's rules (a rules.RuleConfig)
+    and return the payout of every round in tenths of a bet (PAYOUT_SCALE,
+    as in stats.py) as an int16 array: +10 win, 0 push, -10 loss, or the
+    natural payout. Cards are dealt from the front of the row: two to the
+    player, then the dealer's hidden card and upcard, then the player's and
+    dealer's hits.
+    """
+    compiled = as_rules(rules).compile()
+    # The dealer hits while the total is below dealer_limits[soft]
+    dealer_limits = compiled.dealer_limits
+    naturals = compiled.naturals
+    dealer_peek = compiled.dealer_peek
+    push_total = compiled.push_total
+    natural_units = round(compiled.natural_payout * PAYOUT_SCALE)
+
+    rounds, size = shoes.shape
+    data = shoes.tobytes()
+    payouts = array('h', bytes(2 * rounds))
+    for i in range(rounds):
+        position = i * size
+        first, second, hidden, upcard = data[position:position + 4]
+        position += 4
+
+        player_total = first + second
+        player_aces = (first == 11) + (second == 11)
+        if player_total > 21:
+            player_total -= 10
+            player_aces -= 1
+        dealer_total = hidden + upcard
+        dealer_aces = (hidden == 11) + (upcard == 11)
+        if dealer_total > 21:
+            dealer_total -= 10
+            dealer_aces -= 1
+
+        # Naturals: a player natural (or a dealer natural found by peeking)
+        # settles the round before the player acts
+        dealer_natural = False
+        if naturals:
+            dealer_natural = dealer_total == 21
+            if player_total == 21 or (dealer_peek and dealer_natural):
+                if player_total != 21:
+                    payouts[i] = -PAYOUT_SCALE
+                elif not dealer_natural:
+                    payouts[i] = natural_units
+                continue
+
+        while policy(player_total, player_aces > 0, upcard):
+            card = data[position]
+            position += 1
+            player_total += card
+            if card == 11:
+                player_aces += 1
+            while player_total > 21 and player_aces:
+                player_total -= 10
+                player_aces -= 1
+            if player_total > 21:
+                break
+        if player_total > 21 or dealer_natural:
+            payouts[i] = -PAYOUT_SCALE
+            continue
+
+        # dealer_aces is 0 or 1 here: two Aces counted as 11 would bust
+        while dealer_total < dealer_limits[dealer_aces]:
+            card = data[position]
+            position += 1
+            dealer_total += card
+            if card == 11:
+                dealer_aces += 1
+            while dealer_total > 21 and dealer_aces:
+                dealer_total -= 10
+                dealer_aces -= 1
+
+        if dealer_total > 21:
+            if dealer_total != push_total:
+                payouts[i] = PAYOUT_SCALE
+        elif player_total > dealer_total:
+            payouts[i] = PAYOUT_SCALE
+        elif dealer_total > player_total:
+            payouts[i] = -PAYOUT_SCALE
+    return np.frombuffer(payouts, dtype=np.int16)
+
+
+def play_shard(memory_name, shape, start, stop, policy_name, rules):
+    """
+    Worker entry point: attach to the shared shoes (read-only, nothing is
+    copied between processes) and play rows start:stop under one policy.
+    """
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        shoes = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+        shoes.flags.writeable = False
+        return play_shoes(shoes[start:stop], get_policy(policy_name, rules), rules).tobytes()
+    finally:
+        del shoes
+        memory.close()
+
+
+# STATISTICS
+
+def mean_interval(values, z=1.96):
+    """Mean of an array and the half-width of its normal confidence interval."""
+    n = values.size
+    mean = float(values.mean())
+    spread = float(values.std(ddof=1)) if n > 1 else 0.0
+    return mean, z * spread / math.sqrt(n)
+
+
+def compare_policies(payouts, z=1.96):
+    """
+    EV of each policy and paired EV differences against the first policy.
+    For each pair the independent-runs interval half-width is also given,
+    to show how much the shared shoes narrow it.
+    """
+    names = list(payouts)
+    result = {'ev': {}, 'paired': {}}
+    for name in names:
+        result['ev'][name] = mean_interval(payouts[name] / PAYOUT_SCALE, z)
+
+    baseline = names[0]
+    for name in names[1:]:
+        difference = payouts[name].astype(np.int32) - payouts[baseline]
+        mean, half = mean_interval(difference / PAYOUT_SCALE, z)
+        independent = math.hypot(result['ev'][name][1], result['ev'][baseline][1])
+        result['paired'][(name, baseline)] = (mean, half, independent)
+    return result
+
+
+# TOURNAMENT
+
+def run_tournament(policy_names, rounds, seed=0, num_decks=1, workers=1, rules=None):
+    """
+    Play every policy over the same rounds shoes. The shoes are generated
+    once into shared memory; with workers > 1 each (policy, shard) job is
+    run on a process pool that reads them in place. Returns the payouts per
+    policy, compare_policies of them and timings. rules is a
+    rules.RuleConfig; when given, it also sets the deck count.
+    """
+    if rules is None:
+        rules = as_rules(num_decks)
+    num_decks = rules.num_decks
+    size = len(ORDERED_DECK) * num_decks
+    shape = (rounds, size)
+    memory = shared_memory.SharedMemory(create=True, size=rounds * size)
+    try:
+        shoes = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+        start = time.perf_counter()
+        generate_shoes(rounds, num_decks, seed, out=shoes)
+        generated = time.perf_counter() - start
+
+        shards = [(begin, min(begin + SHARD_ROUNDS, rounds))
+                  for begin in range(0, rounds, SHARD_ROUNDS)]
+        start = time.perf_counter()
+        if workers == 1:
+            payouts = {name: np.concatenate([play_shoes(shoes[begin:end],
+                                                        get_policy(name, rules), rules)
+                                             for begin, end in shards])
+                       for name in policy_names}
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                jobs = {name: [pool.submit(play_shard, memory.name, shape, begin, end, name,
+                                           rules)
+                               for begin, end in shards]
+                        for name in policy_names}
+                payouts = {name: np.frombuffer(b"".join(job.result() for job in parts),
+                                               dtype=np.int16)
+                           for name, parts in jobs.items()}
+        played = time.perf_counter() - start
+        del shoes
+    finally:
+        memory.close()
+        memory.unlink()
+
+    return {
+        'payouts': payouts,
+        'comparison': compare_policies(payouts),
+        'generate_seconds': generated,
+        'play_seconds': played,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare policies on identical shoes")
+    parser.add_argument("--policies", nargs="+", default=["dealer", "stand15", "optimal"],
+                        choices=sorted(POLICIES) + TABLE_POLICIES,
+                        help="policies to compare; differences are against the first")
+    parser.add_argument("--rounds", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--decks", type=int, default=1)
+    add_rule_arguments(parser)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (0 = one per CPU core)")
+    args = parser.parse_args()
+
+    rules = rules_from_args(args)
+    result = run_tournament(args.policies, args.rounds, args.seed, args.decks,
+                            args.workers or os.cpu_count() or 1, rules)
+    comparison = result['comparison']
+    print(f"Rules: {rules.key()}")
+    print(f"Rounds: {args.rounds} | shoes generated in {result['generate_seconds']:.2f}s, "
+          f"played in {result['play_seconds']:.2f}s")
+    for name, (ev, half) in comparison['ev'].items():
+        print(f"  {name:10} EV {ev:+.4f} ± {half:.4f}")
+    for (name, baseline), (mean, half, independent) in comparison['paired'].items():
+        print(f"  {name} - {baseline}: {mean:+.4f} ± {half:.4f} "
+              f"(independent runs: ± {independent:.4f})")
+
+
+if __name__ == '__main__':
+    main()